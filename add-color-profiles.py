@@ -5,9 +5,10 @@ Add color scheme profiles to iTerm2 as regular profiles
 
 import plistlib
 import uuid
-from pathlib import Path
 
-ITERM_PLIST = Path.home() / "Library" / "Preferences" / "com.googlecode.iterm2.plist"
+from mac_setup import snapshots
+from mac_setup.paths import ITERM_PLIST
+
 
 # Profile names to add
 COLOR_SCHEMES = [
@@ -101,6 +102,8 @@ def main():
         # Update preferences
         plist_data["New Bookmarks"] = existing_profiles
 
+        snapshots.take_and_report("add-color-profiles")
+
         try:
             write_plist(plist_data)
             print(f"\n✓ Successfully added {len(added)} new profiles")
@@ -8,8 +8,10 @@ import plistlib
 import uuid
 from pathlib import Path
 
-ITERM_PLIST = Path.home() / "Library" / "Preferences" / "com.googlecode.iterm2.plist"
-SCHEMES_DIR = Path.home() / "Downloads" / "iTerm2-Color-Schemes-master" / "schemes"
+from mac_setup import preflight, snapshots
+from mac_setup.paths import DOWNLOADED_SCHEMES_DIR, ITERM_PLIST
+
+SCHEMES_DIR = DOWNLOADED_SCHEMES_DIR
 
 # Map friendly names to .itermcolors files
 COLOR_SCHEMES = {
@@ -28,9 +30,13 @@ COLOR_SCHEMES = {
 def main():
     print("Adding 10 color schemes as regular iTerm2 profiles...\n")
 
-    # Check schemes directory
-    if not SCHEMES_DIR.exists():
-        print(f"❌ Schemes directory not found: {SCHEMES_DIR}")
+    # Schemes directory, scheme files and the Default profile, all checked at once
+    if not preflight.check([
+        preflight.path(SCHEMES_DIR, kind="dir"),
+        preflight.schemes([Path(f).stem for f in COLOR_SCHEMES.values()], SCHEMES_DIR,
+                          preflight.WARNING, skip_missing_dir=True),
+        preflight.plist(ITERM_PLIST, profiles=["Default"]),
+    ]):
         return 1
 
     # Read iTerm2 preferences
@@ -72,7 +78,7 @@ def main():
         scheme_path = SCHEMES_DIR / scheme_file
 
         if not scheme_path.exists():
-            print(f"❌ Not found: {scheme_file}")
+            # Already reported by the preflight check
             continue
 
         try:
@@ -112,6 +118,8 @@ def main():
         print(f"\nWriting {added} new profiles to iTerm2 preferences...")
         plist_data["New Bookmarks"] = bookmarks
 
+        snapshots.take_and_report("add-color-schemes-as-regular-profiles")
+
         try:
             with open(ITERM_PLIST, 'wb') as f:
                 plistlib.dump(plist_data, f)
@@ -1,100 +1,52 @@
 #!/usr/bin/env python3
+"""
+Create top-level iTerm2 profiles with colors embedded from the installed ColorPresets
+"""
 
-import json
-import plistlib
-from pathlib import Path
-import uuid
+from mac_setup import snapshots
+from mac_setup.paths import COLOR_PRESETS_DIR, DYNAMIC_PROFILES_DIR
+from mac_setup.profiles import EMBEDDED_SCHEMES, embedded_profile, load_scheme, pack_bytes, raw_colors
 
-# Paths
-color_presets_dir = Path.home() / "Library/Application Support/iTerm2/ColorPresets"
-dynamic_profiles_dir = Path.home() / "Library/Application Support/iTerm2/DynamicProfiles"
-output_file = dynamic_profiles_dir / "ColorProfiles.json"
+def main():
+    output_file = DYNAMIC_PROFILES_DIR / "ColorProfiles.json"
+    profiles = []
 
-# Create directory if needed
-dynamic_profiles_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Creating {len(EMBEDDED_SCHEMES)} color profiles with embedded colors...")
 
-# The 10 color schemes we want
-schemes = [
-    "Dracula.itermcolors",
-    "Gruvbox Dark.itermcolors",
-    "Nord.itermcolors",
-    "Atom One Dark.itermcolors",
-    "Solarized Dark Higher Contrast.itermcolors",
-    "Monokai Remastered.itermcolors",
-    "TokyoNight.itermcolors",
-    "Catppuccin Mocha.itermcolors",
-    "Pale Night Hc.itermcolors",
-    "Ayu.itermcolors",
-]
+    for scheme_name, profile_name in EMBEDDED_SCHEMES.items():
+        scheme_file = f"{scheme_name}.itermcolors"
+        scheme_path = COLOR_PRESETS_DIR / scheme_file
 
-# Friendly names (without .itermcolors extension)
-friendly_names = {
-    "Dracula.itermcolors": "Dracula",
-    "Gruvbox Dark.itermcolors": "Gruvbox Dark",
-    "Nord.itermcolors": "Nord",
-    "Atom One Dark.itermcolors": "Atom One Dark",
-    "Solarized Dark Higher Contrast.itermcolors": "Solarized Dark",
-    "Monokai Remastered.itermcolors": "Monokai",
-    "TokyoNight.itermcolors": "Tokyo Night",
-    "Catppuccin Mocha.itermcolors": "Catppuccin",
-    "Pale Night Hc.itermcolors": "Palenight",
-    "Ayu.itermcolors": "Ayu",
-}
+        if not scheme_path.exists():
+            print(f"⚠ Not found: {scheme_file}")
+            continue
 
-profiles = []
+        # Read the .itermcolors file (it's a plist)
+        try:
+            colors = raw_colors(load_scheme(scheme_path.read_bytes()))
+        except Exception as e:
+            print(f"⚠ Error reading {scheme_file}: {e}")
+            continue
 
-print("Creating 10 color profiles with embedded colors...")
-
-for scheme_file in schemes:
-    scheme_path = color_presets_dir / scheme_file
-    
-    if not scheme_path.exists():
-        print(f"⚠ Not found: {scheme_file}")
-        continue
-    
-    # Read the .itermcolors file (it's a plist)
-    try:
-        with open(scheme_path, 'rb') as f:
-            colors = plistlib.load(f)
-        
-        profile_name = friendly_names.get(scheme_file, scheme_file.replace('.itermcolors', ''))
-        
-        # Create profile with embedded colors
-        profile = {
-            "Name": profile_name,
-            "Guid": f"{profile_name}-{uuid.uuid4()}",
-            "Dynamic Profile Parent Name": "Default",
-            "Normal Font": "JetBrainsMono-Regular 13",
-            "Scrollback Lines": 100000,
-            "Unlimited Scrollback": False,
-            "Terminal Type": "xterm-256color",
-            "Use Bold Font": True,
-            "Use Bright Bold": True,
-            "Use Italic Font": True,
-            "Visual Bell": True,
-        }
-        
-        # Copy all color settings from the scheme
-        for key, value in colors.items():
-            if 'Color' in key:
-                profile[key] = value
-        
-        profiles.append(profile)
+        profiles.append(embedded_profile(profile_name, colors))
         print(f"✓ {profile_name}")
-        
-    except Exception as e:
-        print(f"⚠ Error reading {scheme_file}: {e}")
 
-# Write the JSON file
-output_data = {"Profiles": profiles}
+    snapshots.take_and_report("create-color-profiles-embedded")
+
+    # Write the JSON file
+    # Shared settings go into one generated parent profile
+    DYNAMIC_PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    output_file.write_bytes(pack_bytes(profiles, output_file.stem))
+
+    print(f"\n✓ Created {len(profiles)} profiles at: {output_file}")
+    print("\nProfiles created:")
+    for profile in profiles:
+        print(f"  • {profile['Name']}")
+    print("\nRestart iTerm2 to see the profiles.")
+    print("They will appear directly in: Profiles → Open Profiles")
+    print("No submenus - all at the top level!")
 
-with open(output_file, 'w') as f:
-    json.dump(output_data, f, indent=2)
+    return 0
 
-print(f"\n✓ Created {len(profiles)} profiles at: {output_file}")
-print("\nProfiles created:")
-for profile in profiles:
-    print(f"  • {profile['Name']}")
-print("\nRestart iTerm2 to see the profiles.")
-print("They will appear directly in: Profiles → Open Profiles")
-print("No submenus - all at the top level!")
+if __name__ == "__main__":
+    exit(main())
@@ -3,9 +3,16 @@
 # Create iTerm2 profiles for each of the 10 color schemes
 # No tags = no submenus
 
+SCRIPT_DIR="${0:A:h}"
 DYNAMIC_PROFILES_DIR="$HOME/Library/Application Support/iTerm2/DynamicProfiles"
 mkdir -p "$DYNAMIC_PROFILES_DIR"
 
+# Guids are derived from the profile name (as mac_setup/profiles.py does), so
+# regenerating this file keeps every profile paired with its regular copy
+stable_guid() {
+    PYTHONPATH="$SCRIPT_DIR" python3 -c 'import sys; from mac_setup.profiles import stable_guid; print(stable_guid(sys.argv[1]))' "$1"
+}
+
 echo "Creating 10 color scheme profiles..."
 
 # Define the 10 color schemes
@@ -22,6 +29,9 @@ typeset -A COLOR_SCHEMES=(
     ["Ayu"]="Ayu"
 )
 
+# Snapshot current iTerm2 state so this run can be undone with ./mac-setup rollback <id>
+"$SCRIPT_DIR/mac-setup" snapshot -m "create-color-profiles"
+
 # Start JSON
 cat > "$DYNAMIC_PROFILES_DIR/ColorProfiles.json" << 'EOF'
 {
@@ -41,7 +51,7 @@ for profile_name in "${(@k)COLOR_SCHEMES}"; do
     cat >> "$DYNAMIC_PROFILES_DIR/ColorProfiles.json" << EOF
     {
       "Name": "$profile_name",
-      "Guid": "$profile_name-$(uuidgen)",
+      "Guid": "$(stable_guid "$profile_name")",
       "Dynamic Profile Parent Name": "Default",
       "Color Preset Name": "$COLOR_PRESET",
       "Normal Font": "JetBrainsMono-Regular 13",
@@ -62,6 +72,9 @@ cat >> "$DYNAMIC_PROFILES_DIR/ColorProfiles.json" << 'EOF'
 }
 EOF
 
+# Move the settings every profile repeats into one generated parent profile
+"$SCRIPT_DIR/mac-setup" compact "$DYNAMIC_PROFILES_DIR/ColorProfiles.json"
+
 echo "✓ Created 10 color profiles at: $DYNAMIC_PROFILES_DIR/ColorProfiles.json"
 echo ""
 echo "Profiles created:"
@@ -4,142 +4,76 @@ Create standalone iTerm2 profiles for recommended color schemes
 These profiles are NOT tied to directories - use them manually or with tmux/workmux
 """
 
-import json
-import plistlib
-import os
-from pathlib import Path
-
-# Paths
-DYNAMIC_PROFILES_DIR = Path.home() / "Library" / "Application Support" / "iTerm2" / "DynamicProfiles"
-SCHEMES_DIR = Path.home() / "Downloads" / "iTerm2-Color-Schemes-master" / "schemes"
-
-# Recommended color schemes for code development
-RECOMMENDED_SCHEMES = [
-    # Top Tier - Excellent for long coding sessions
-    "TokyoNight Storm",
-    "Catppuccin Mocha",
-    "Gruvbox Material Dark",
-    "Nord",
-    "Atom One Dark",
-
-    # High Contrast - Great visibility
-    "Dracula",
-    "Monokai Pro",
-    "Oceanic Next",
-    "Material Darker",
-
-    # Unique & Colorful
-    "Ayu Mirage",
-    "TokyoNight Moon",
-    "Snazzy",
-    "Material Ocean",
-
-    # Classics
-    "Solarized Dark Patched",
-    "Gruvbox Dark",
-    "Tomorrow Night",
-
-    # Additional good options
-    "TokyoNight Night",
-    "Catppuccin Frappe",
-    "Monokai Remastered",
-    "One Dark Two",
-]
-
-def extract_color(color_dict):
-    """Extract RGB components from color dictionary"""
-    if not color_dict or not isinstance(color_dict, dict):
-        return None
-    return {
-        "Red Component": float(color_dict.get("Red Component", 0)),
-        "Green Component": float(color_dict.get("Green Component", 0)),
-        "Blue Component": float(color_dict.get("Blue Component", 0))
-    }
-
-def load_color_scheme(scheme_path):
-    """Load color scheme from .itermcolors file"""
-    with open(scheme_path, 'rb') as f:
-        return plistlib.load(f)
-
-def create_profile(scheme_name, colors, guid_suffix):
-    """Create a standalone profile dictionary with full color scheme"""
-    import uuid
-
-    profile = {
-        "Name": scheme_name,
-        "Guid": f"{scheme_name.replace(' ', '-')}-{guid_suffix}",
-        "Dynamic Profile Parent Name": "Default",
-        "Tags": ["standalone", "code-dev"],
-        "Badge Text": scheme_name,
-        "Normal Font": "JetBrainsMono-Regular 13",
-        "Scrollback Lines": 100000,
-        "Unlimited Scrollback": False,
-        "Terminal Type": "xterm-256color",
-        "Use Bold Font": True,
-        "Use Bright Bold": True,
-        "Use Italic Font": True,
-        "Visual Bell": True,
-        "Silence Bell": True,
-    }
-
-    # Add background and foreground colors
-    if "Background Color" in colors:
-        profile["Background Color"] = extract_color(colors["Background Color"])
-    if "Foreground Color" in colors:
-        profile["Foreground Color"] = extract_color(colors["Foreground Color"])
-
-    # Add all 16 ANSI colors
-    for i in range(16):
-        ansi_key = f"Ansi {i} Color"
-        if ansi_key in colors:
-            profile[ansi_key] = extract_color(colors[ansi_key])
-
-    # Add optional colors
-    for color_type in ["Cursor Color", "Cursor Text Color", "Bold Color",
-                       "Selection Color", "Selected Text Color", "Link Color"]:
-        if color_type in colors:
-            color_value = extract_color(colors[color_type])
-            if color_value:
-                profile[color_type] = color_value
-
-    # NO automatic profile switching - let tmux/workmux handle it
-
-    return profile
+import argparse
+
+from mac_setup import catalog, preflight, presets, snapshots
+from mac_setup.paths import DOWNLOADED_SCHEMES_DIR, DYNAMIC_PROFILES_DIR
+from mac_setup.profiles import STANDALONE_SCHEMES as RECOMMENDED_SCHEMES
+from mac_setup.profiles import load_scheme, pack_bytes, rgb_colors, standalone_profile
+
+SCHEMES_DIR = DOWNLOADED_SCHEMES_DIR
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-contrast", type=float, metavar="RATIO",
+                        help="skip schemes whose contrast is below RATIO (e.g. 4.5 for WCAG AA)")
+    parser.add_argument("--metric", choices=catalog.METRICS, default="fg_bg",
+                        help="contrast metric checked by --min-contrast (default: fg_bg)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     profiles = []
     missing_schemes = []
-    guid_suffix = 0
 
     print("Creating standalone iTerm2 profiles for code development...\n")
     print(f"Looking for schemes in: {SCHEMES_DIR}\n")
 
+    # Everything this run needs, checked at once before any scheme is read
+    if not preflight.check([
+        preflight.path(SCHEMES_DIR, kind="dir"),
+        preflight.schemes(RECOMMENDED_SCHEMES, SCHEMES_DIR, preflight.WARNING, skip_missing_dir=True),
+        preflight.writable(DYNAMIC_PROFILES_DIR),
+    ]):
+        return 1
+
+    # Same name resolution as the preflight check, e.g. "Gruvbox Dark" → GruvboxDark.itermcolors
+    available = presets.scan(SCHEMES_DIR)
+    scheme_files = {name: presets.scheme_file(name, available) for name in RECOMMENDED_SCHEMES}
+
+    low_contrast = {}
+    if args.min_contrast is not None:
+        low_contrast = catalog.below_threshold(
+            SCHEMES_DIR, [f[:-len(presets.SUFFIX)] for f in scheme_files.values() if f],
+            args.min_contrast, args.metric)
+
     for scheme_name in RECOMMENDED_SCHEMES:
-        scheme_path = SCHEMES_DIR / f"{scheme_name}.itermcolors"
+        file_name = scheme_files[scheme_name]
 
-        if not scheme_path.exists():
-            print(f"⚠️  Scheme not found: {scheme_name}")
+        if file_name is None:
+            # Warned about by the preflight check, listed again in the summary
             missing_schemes.append(scheme_name)
             continue
 
+        contrast = low_contrast.get(file_name[:-len(presets.SUFFIX)])
+        if contrast is not None:
+            print(f"⚠️  Skipping {scheme_name}: {args.metric} contrast "
+                  f"{contrast:.2f}:1 < {args.min_contrast}:1")
+            continue
+
         print(f"✓ {scheme_name}")
 
-        # Load color scheme
-        colors = load_color_scheme(scheme_path)
+        colors = rgb_colors(load_scheme((SCHEMES_DIR / file_name).read_bytes()))
+        profiles.append(standalone_profile(scheme_name, colors))
 
-        # Create profile
-        profile = create_profile(scheme_name, colors, guid_suffix)
-        profiles.append(profile)
-        guid_suffix += 1
+    snapshots.take_and_report("create-standalone-profiles")
 
     # Write profiles JSON
     output_file = DYNAMIC_PROFILES_DIR / "CodeDevProfiles.json"
     DYNAMIC_PROFILES_DIR.mkdir(parents=True, exist_ok=True)
 
-    profiles_data = {"Profiles": profiles}
-
-    with open(output_file, 'w') as f:
-        json.dump(profiles_data, f, indent=2)
+    # Shared settings go into one generated parent profile
+    output_file.write_bytes(pack_bytes(profiles, output_file.stem))
 
     print(f"\n{'='*60}")
     print(f"✓ Created {len(profiles)} profiles at:")
@@ -166,9 +100,13 @@ def main():
     print("4. Or manually select from the profile dropdown in iTerm2")
     print()
     print("To integrate with tmux/workmux:")
-    print("  - In tmux: run-shell 'echo -e \"\\033]50;SetProfile=TokyoNight Storm\\a\"'")
+    print("  - Repo directories switch automatically via the generated zsh/tmux hooks")
+    print("    (~/.mac-setup/profile-switch.zsh, deployed by ./mac-setup dotfiles)")
+    print("  - Manually: printf '\\e]1337;SetProfile=TokyoNight Storm\\a'")
     print("  - In workmux config: set profile per workspace")
     print()
 
+    return 0
+
 if __name__ == "__main__":
-    main()
+    exit(main())
@@ -2,29 +2,9 @@
 
 # iTerm2 Top Development Color Schemes Installer
 # Installs 10 carefully selected schemes with distinct visual styles
+# Usage: ./install-dev-color-schemes.sh [--all]
 
-SCHEMES_DIR="$HOME/.iterm2-color-schemes"
-ITERM_SCHEMES_DIR="$HOME/Library/Application Support/iTerm2/ColorPresets"
-
-# Create directories
-mkdir -p "$ITERM_SCHEMES_DIR"
-mkdir -p "$SCHEMES_DIR"
-
-echo "Downloading iTerm2 color schemes repository..."
-
-# Clone or update the color schemes repository
-if [ -d "$SCHEMES_DIR/.git" ]; then
-    echo "Updating existing repository..."
-    cd "$SCHEMES_DIR"
-    git pull
-else
-    echo "Cloning color schemes repository..."
-    rm -rf "$SCHEMES_DIR"
-    git clone https://github.com/mbadolato/iTerm2-Color-Schemes.git "$SCHEMES_DIR"
-fi
-
-echo ""
-echo "Installing top 10 development color schemes..."
+SCRIPT_DIR="${0:A:h}"
 
 # Array of the best development schemes (visually distinct)
 BEST_SCHEMES=(
@@ -40,21 +20,33 @@ BEST_SCHEMES=(
     "Ayu"                         # Dark blue - clean
 )
 
-# Copy selected schemes
-for scheme in "${BEST_SCHEMES[@]}"; do
-    if [ -f "$SCHEMES_DIR/schemes/${scheme}.itermcolors" ]; then
-        cp "$SCHEMES_DIR/schemes/${scheme}.itermcolors" "$ITERM_SCHEMES_DIR/"
-        echo "✓ Installed: $scheme"
-    else
-        echo "⚠ Not found: $scheme (trying variations...)"
-        # Try without spaces
-        scheme_nospace="${scheme// /}"
-        if [ -f "$SCHEMES_DIR/schemes/${scheme_nospace}.itermcolors" ]; then
-            cp "$SCHEMES_DIR/schemes/${scheme_nospace}.itermcolors" "$ITERM_SCHEMES_DIR/"
-            echo "✓ Installed: $scheme_nospace"
-        fi
-    fi
-done
+# Report every missing command, unwritable path, unknown scheme or plist problem at once
+if [[ "$1" == "--all" ]]; then
+    "$SCRIPT_DIR/mac-setup" preflight color-schemes || exit 1
+else
+    "$SCRIPT_DIR/mac-setup" preflight color-schemes --schemes "${BEST_SCHEMES[@]}" || exit 1
+fi
+
+echo ""
+echo "Fetching iTerm2 color schemes (schemes/*.itermcolors only)..."
+
+# Sparse, shallow clone on first run; fast-forward-only update afterwards
+if ! "$SCRIPT_DIR/mac-setup" fetch iterm2-color-schemes; then
+    echo "⚠ Could not fetch the color schemes repository"
+    exit 1
+fi
+
+echo ""
+echo "Installing top 10 development color schemes..."
+
+# Link selected schemes into ColorPresets (pass --all for the whole catalog)
+# Installed files are tracked, so re-runs only touch what changed and
+# "./mac-setup presets uninstall" removes exactly what was installed
+if [[ "$1" == "--all" ]]; then
+    "$SCRIPT_DIR/mac-setup" presets install --all
+else
+    "$SCRIPT_DIR/mac-setup" presets install "${BEST_SCHEMES[@]}"
+fi
 
 echo ""
 echo "Configuring keyboard shortcuts (Command+Left/Right for tabs)..."
@@ -64,6 +56,7 @@ ITERM_PLIST="$HOME/Library/Preferences/com.googlecode.iterm2.plist"
 if [ ! -f "$ITERM_PLIST" ]; then
     echo "⚠ iTerm2 preferences not found. Please open iTerm2 at least once."
 else
+    "$SCRIPT_DIR/mac-setup" snapshot -m "install-dev-color-schemes"
     /usr/bin/python3 - <<'PYPLIST'
 import plistlib
 from pathlib import Path
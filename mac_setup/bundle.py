@@ -0,0 +1,423 @@
+"""
+Offline provisioning bundles
+
+`build()` collects everything a machine would otherwise download into one
+versioned tar archive:
+
+- Homebrew bottles and cask downloads for our packages (plus dependencies) and
+  Homebrew's API cache, and the taps they come from
+- snapshots of the git checkouts (TPM, iTerm2 color schemes)
+- rendered dotfiles and DynamicProfiles files, with the builder's home directory
+  replaced by a placeholder
+
+MANIFEST.json inside the archive records the sha256 of every member, and a
+`<archive>.sha256` file next to it covers the archive as a whole. `apply()`
+verifies both, extracts the archive once under ~/.mac-setup/bundles and
+provisions from it with Homebrew pointed at the bundled cache and auto-update
+off, so no network access is needed.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import tarfile
+import time
+from pathlib import Path, PurePosixPath
+
+from . import dotfiles, gitfetch, presets, snapshots
+from .paths import BACKUPS_DIR, DYNAMIC_PROFILES_DIR, HOME, SCHEMES_DIR, STATE_DIR
+from .state import atomic_write, load_manifest
+
+BREW = os.environ.get("MAC_SETUP_BREW", "brew")
+BUNDLE_FORMAT = 1
+BUNDLES_DIR = STATE_DIR / "bundles"
+MANIFEST_NAME = "MANIFEST.json"
+HOME_TOKEN = "/@MAC_SETUP_HOME@"
+# Versions name files and directories, so no separators, no "..", no leading dot
+VERSION_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+
+# Packages installed by setup-dev-environment.sh and setup-iterm-profiles.sh
+FORMULAE = [
+    "tmux", "node", "python@3.9", "python@3.11", "python@3.13", "poetry", "uv",
+    "ollama", "ffmpeg", "neovim", "tmuxinator", "raine/workmux/workmux", "git",
+]
+CASKS = [
+    "iterm2", "docker", "cursor",
+    "font-jetbrains-mono", "font-fira-code", "font-cascadia-code",
+]
+
+# Environment for offline installs from the bundled cache
+OFFLINE_ENV = {
+    "HOMEBREW_NO_AUTO_UPDATE": "1",
+    "HOMEBREW_NO_INSTALL_CLEANUP": "1",
+    "HOMEBREW_NO_ANALYTICS": "1",
+}
+
+
+class BundleError(Exception):
+    pass
+
+
+def brew(*args, env=None):
+    """Run brew, returning stdout and raising BundleError with stderr on failure"""
+    result = subprocess.run([BREW, *args], capture_output=True, text=True,
+                            env={**os.environ, **env} if env else None)
+    if result.returncode != 0:
+        raise BundleError(result.stderr.strip() or f"brew {args[0]} failed")
+    return result.stdout.strip()
+
+
+def check_version(version):
+    """Reject bundle versions that are not a plain file name"""
+    if not isinstance(version, str) or not VERSION_PATTERN.fullmatch(version):
+        raise BundleError(f"invalid bundle version {version!r}")
+    return version
+
+
+def version_dir(bundles_dir, version):
+    """Directory for an extracted bundle, guaranteed to be inside bundles_dir"""
+    dest = Path(bundles_dir) / check_version(version)
+    if dest.resolve().parent != Path(bundles_dir).resolve():
+        raise BundleError(f"bundle version {version!r} escapes {bundles_dir}")
+    return dest
+
+
+def lines(text):
+    return [line for line in text.splitlines() if line.strip()]
+
+
+def taps(formulae):
+    """Taps needed for fully qualified formula names (user/repo/formula)"""
+    return sorted({f.rsplit("/", 1)[0] for f in formulae if f.count("/") == 2})
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_token(data, home=HOME):
+    """Replace the home directory with the placeholder"""
+    return data.replace(str(home).encode(), HOME_TOKEN.encode())
+
+
+def from_token(data, home=HOME):
+    return data.replace(HOME_TOKEN.encode(), str(home).encode())
+
+
+class HashingReader:
+    """File wrapper hashing everything tarfile reads from it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.digest.update(data)
+        return data
+
+
+class Writer:
+    """Adds members to the archive and records their checksums"""
+
+    def __init__(self, tar):
+        self.tar = tar
+        self.files = {}
+
+    def add_bytes(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self.tar.addfile(info, fileobj=io.BytesIO(data))
+        self.files[name] = hashlib.sha256(data).hexdigest()
+
+    def add_file(self, name, path):
+        info = self.tar.gettarinfo(str(path), arcname=name)
+        if info.isreg():
+            with open(path, 'rb') as f:
+                reader = HashingReader(f)
+                self.tar.addfile(info, fileobj=reader)
+            self.files[name] = reader.digest.hexdigest()
+        else:
+            self.tar.addfile(info)
+
+    def add_tree(self, name, root):
+        """Add a directory tree (symlinks kept as links)"""
+        root = Path(root)
+        self.add_file(name, root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            rel = Path(dirpath).relative_to(root)
+            for entry in dirnames + sorted(filenames):
+                self.add_file(str(PurePosixPath(name) / rel.as_posix() / entry), Path(dirpath) / entry)
+
+
+def brew_downloads(formulae, casks):
+    """Fetch bottles and casks; returns [(path relative to the brew cache, file)]"""
+    root = Path(brew("--cache"))
+    for tap in taps(formulae):
+        brew("tap", tap)
+
+    paths = []
+    if formulae:
+        brew("fetch", "--deps", *formulae)
+        deps = lines(brew("deps", "--union", *formulae))
+        names = sorted(set(formulae) | set(deps))
+        paths += lines(brew("--cache", *names))
+    if casks:
+        brew("fetch", "--cask", *casks)
+        paths += lines(brew("--cache", "--cask", *casks))
+
+    downloads = []
+    for path in map(Path, paths):
+        if not path.exists():
+            raise BundleError(f"brew did not download {path.name}")
+        try:
+            rel = path.relative_to(root)
+        except ValueError:
+            rel = Path("downloads") / path.name
+        downloads.append((rel.as_posix(), path.resolve()))
+
+    # Formula/cask metadata, so installs need no API requests
+    api_dir = root / "api"
+    if api_dir.is_dir():
+        for path in sorted(api_dir.rglob("*")):
+            if path.is_file():
+                downloads.append((path.relative_to(root).as_posix(), path))
+    return downloads
+
+
+def build(output_dir, version=None, formulae=FORMULAE, casks=CASKS, repos=None,
+          include_brew=True):
+    """Build a bundle in output_dir; returns the archive path"""
+    repos = gitfetch.REPOS if repos is None else repos
+    version = check_version(version or time.strftime("%Y%m%d-%H%M%S"))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    archive = output_dir / f"mac-setup-bundle-{version}.tar"
+
+    manifest = {"format": BUNDLE_FORMAT, "version": version,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "formulae": [], "casks": [], "taps": [], "repos": {},
+                "dotfiles": [], "profiles": [], "presets": []}
+
+    for result in gitfetch.fetch_all(repos):
+        if result["action"] == "failed":
+            raise BundleError(f"{result['name']}: {result['error']}")
+
+    downloads = []
+    if include_brew:
+        downloads = brew_downloads(formulae, casks)
+        manifest["formulae"] = list(formulae)
+        manifest["casks"] = list(casks)
+        manifest["taps"] = taps(formulae)
+
+    tmp = archive.with_name(archive.name + ".tmp")
+    with tarfile.open(tmp, "w", format=tarfile.PAX_FORMAT) as tar:
+        writer = Writer(tar)
+
+        for rel, path in downloads:
+            writer.add_file(f"brew/cache/{rel}", path)
+        for tap in manifest["taps"]:
+            writer.add_tree(f"brew/taps/{tap}", brew("--repository", tap))
+
+        for name, spec in repos.items():
+            head = gitfetch.git("rev-parse", "HEAD", cwd=spec["dest"])
+            writer.add_tree(f"git/{name}", spec["dest"])
+            manifest["repos"][name] = head
+
+        for name in dotfiles.DOTFILES:
+            writer.add_bytes(f"dotfiles/{name}", to_token(dotfiles.render(name)))
+            manifest["dotfiles"].append(name)
+
+        if DYNAMIC_PROFILES_DIR.is_dir():
+            for path in sorted(DYNAMIC_PROFILES_DIR.glob("*.json")):
+                writer.add_bytes(f"profiles/{path.name}", to_token(path.read_bytes()))
+                manifest["profiles"].append(path.name)
+
+        manifest["presets"] = sorted(load_manifest(presets.MANIFEST_FILE).get("files", {}))
+        manifest["files"] = writer.files
+        writer.add_bytes(MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    os.replace(tmp, archive)
+    digest = file_sha256(archive)
+    atomic_write(archive.with_name(archive.name + ".sha256"), f"{digest}  {archive.name}\n".encode())
+    return archive
+
+
+def verify_archive(archive):
+    """Check the archive against its .sha256 file"""
+    checksum_file = archive.with_name(archive.name + ".sha256")
+    try:
+        expected = checksum_file.read_text().split()[0]
+    except (FileNotFoundError, IndexError):
+        raise BundleError(f"missing checksum file {checksum_file.name}")
+    if file_sha256(archive) != expected:
+        raise BundleError(f"{archive.name} does not match {checksum_file.name}")
+
+
+def safe_member(name):
+    path = PurePosixPath(name)
+    return not path.is_absolute() and ".." not in path.parts
+
+
+def extract(archive, bundles_dir=BUNDLES_DIR):
+    """Extract a verified archive once; returns (directory, manifest)"""
+    with tarfile.open(archive) as tar:
+        try:
+            manifest = json.loads(tar.extractfile(MANIFEST_NAME).read())
+        except KeyError:
+            raise BundleError(f"{archive.name} has no {MANIFEST_NAME}")
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError(f"unsupported bundle format {manifest.get('format')}")
+
+        dest = version_dir(bundles_dir, manifest.get("version"))
+        if (dest / MANIFEST_NAME).exists():
+            return dest, manifest
+
+        staging = dest.with_name(f".{dest.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        expected = manifest["files"]
+        for member in tar:
+            if member.name == MANIFEST_NAME:
+                continue
+            if not safe_member(member.name) or member.islnk() or member.isdev():
+                raise BundleError(f"refusing to extract {member.name}")
+            if member.issym() and not safe_member(member.linkname):
+                raise BundleError(f"refusing to extract {member.name} -> {member.linkname}")
+            target = staging / member.name
+            if member.isdir():
+                target.mkdir(parents=True, exist_ok=True)
+            elif member.issym():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.symlink(member.linkname, target)
+            elif member.isreg():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                digest = hashlib.sha256()
+                src = tar.extractfile(member)
+                with open(target, 'wb') as out:
+                    for chunk in iter(lambda: src.read(1 << 20), b""):
+                        digest.update(chunk)
+                        out.write(chunk)
+                os.chmod(target, member.mode & 0o755 | 0o600)
+                if digest.hexdigest() != expected.get(member.name):
+                    raise BundleError(f"checksum mismatch for {member.name}")
+        missing = [m for m in expected if not (staging / m).is_file()]
+        if missing:
+            raise BundleError(f"archive is missing {len(missing)} member(s)")
+        atomic_write(staging / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(staging, dest)
+    return dest, manifest
+
+
+def install_taps(root, manifest):
+    results = []
+    for tap in manifest["taps"]:
+        target = Path(brew("--repository", tap))
+        if target.exists():
+            results.append(("tap", tap, "unchanged"))
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(root / "brew" / "taps" / tap, target, symlinks=True)
+        results.append(("tap", tap, "installed"))
+    return results
+
+
+def install_packages(root, manifest):
+    """brew install from the bundled cache with auto-update off"""
+    env = {**OFFLINE_ENV, "HOMEBREW_CACHE": str(root / "brew" / "cache")}
+    results = []
+    if manifest["formulae"]:
+        brew("install", *manifest["formulae"], env=env)
+        results += [("formula", name, "installed") for name in manifest["formulae"]]
+    if manifest["casks"]:
+        brew("install", "--cask", *manifest["casks"], env=env)
+        results += [("cask", name, "installed") for name in manifest["casks"]]
+    return results
+
+
+def restore_checkouts(root, manifest, repos=None):
+    """Put each git checkout in place, moving a different existing one to backups"""
+    repos = gitfetch.REPOS if repos is None else repos
+    results = []
+    for name, head in manifest["repos"].items():
+        dest = Path(repos[name]["dest"])
+        if (dest / ".git").exists():
+            try:
+                if gitfetch.git("rev-parse", "HEAD", cwd=dest) == head:
+                    results.append(("git", name, "unchanged"))
+                    continue
+            except gitfetch.FetchError:
+                pass
+            backup = BACKUPS_DIR / "git" / f"{name}.{time.strftime('%Y%m%d-%H%M%S')}"
+            backup.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(dest, backup)
+        elif dest.exists() and any(dest.iterdir()):
+            results.append(("git", name, f"skipped: {dest} exists but is not a git checkout"))
+            continue
+        elif dest.exists():
+            dest.rmdir()
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(root / "git" / name, dest, symlinks=True)
+        results.append(("git", name, "restored"))
+    return results
+
+
+def apply_profiles(root, manifest, home=HOME):
+    """Write bundled DynamicProfiles files that differ, after a snapshot"""
+    wanted = {}
+    for name in manifest["profiles"]:
+        content = from_token((root / "profiles" / name).read_bytes(), home)
+        target = DYNAMIC_PROFILES_DIR / name
+        if not target.exists() or target.read_bytes() != content:
+            wanted[target] = content
+    results = [("profile", name, "unchanged") for name in manifest["profiles"]
+               if DYNAMIC_PROFILES_DIR / name not in wanted]
+    if wanted:
+        snapshots.take("bundle-apply")
+        for target, content in wanted.items():
+            atomic_write(target, content)
+            results.append(("profile", target.name, "updated"))
+    return results
+
+
+def apply(archive, home=HOME, include_brew=True):
+    """Provision this machine from a bundle without network access
+
+    Returns a list of (kind, name, status) tuples.
+    """
+    archive = Path(archive)
+    verify_archive(archive)
+    root, manifest = extract(archive)
+    results = []
+
+    if include_brew:
+        results += install_taps(root, manifest)
+        results += install_packages(root, manifest)
+    results += restore_checkouts(root, manifest)
+
+    rendered = {name: from_token((root / "dotfiles" / name).read_bytes(), home)
+                for name in manifest["dotfiles"] if name in dotfiles.DOTFILES}
+    for name, target, status, _ in dotfiles.deploy(list(rendered), home=home, rendered=rendered):
+        results.append(("dotfile", str(target), status))
+
+    results += apply_profiles(root, manifest, home)
+
+    if manifest["presets"]:
+        available = presets.scan(SCHEMES_DIR)
+        result = presets.sync([n for n in manifest["presets"] if n in available])
+        results.append(("presets", f"{len(manifest['presets'])} schemes",
+                         f"{len(result['installed'])} installed"))
+    return results
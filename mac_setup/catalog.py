@@ -0,0 +1,202 @@
+"""
+Parsed scheme catalog with cached contrast metrics
+
+Each .itermcolors file is parsed once into plain RGB triples and cached (keyed
+by size/mtime) in ~/.mac-setup/cache, one cache file per schemes directory.
+Single schemes can be loaded lazily with `colors()`; `refresh()` brings the
+whole cache up to date and computes WCAG contrast metrics for every new or
+changed scheme in one columnar batch, so filtering and sorting the catalog by
+readability afterwards is just a read of the cache.
+"""
+
+import json
+import os
+import plistlib
+from pathlib import Path
+
+from .paths import SCHEMES_DIR, STATE_DIR
+from .state import atomic_write, sha256
+
+CACHE_DIR = STATE_DIR / "cache"
+CACHE_VERSION = 1
+SUFFIX = ".itermcolors"
+
+ANSI_KEYS = [f"Ansi {i} Color" for i in range(16)]
+COLOR_KEYS = ["Background Color", "Foreground Color", *ANSI_KEYS, "Bold Color",
+              "Cursor Color", "Cursor Text Color", "Selection Color",
+              "Selected Text Color", "Link Color"]
+
+# Summary metrics usable for sorting and thresholds
+METRICS = ["fg_bg", "ansi_min", "ansi_mean", "selection", "min", "mean"]
+
+
+def cache_file(schemes_dir):
+    """Cache location for a schemes directory"""
+    return CACHE_DIR / f"schemes-{sha256(str(Path(schemes_dir).resolve()).encode())[:12]}.json"
+
+
+def parse_scheme(data):
+    """Parse .itermcolors bytes into {color key: [r, g, b]}"""
+    scheme = plistlib.loads(data)
+    colors = {}
+    for key in COLOR_KEYS:
+        value = scheme.get(key)
+        if isinstance(value, dict):
+            colors[key] = [float(value.get(f"{c} Component", 0)) for c in ("Red", "Green", "Blue")]
+    return colors
+
+
+def scan(schemes_dir=SCHEMES_DIR):
+    """Map scheme name -> [size, mtime_ns] for every scheme file, sorted by name"""
+    try:
+        with os.scandir(schemes_dir) as it:
+            entries = [e for e in it if e.name.endswith(SUFFIX)]
+    except FileNotFoundError:
+        return {}
+    stats = {}
+    for e in sorted(entries, key=lambda e: e.name.lower()):
+        st = e.stat()
+        stats[e.name[:-len(SUFFIX)]] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def load_cache(schemes_dir=SCHEMES_DIR):
+    try:
+        with open(cache_file(schemes_dir), 'r') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": CACHE_VERSION, "schemes": {}}
+    if cache.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "schemes": {}}
+    return cache
+
+
+def save_cache(cache, schemes_dir=SCHEMES_DIR):
+    atomic_write(cache_file(schemes_dir), json.dumps(cache, separators=(",", ":")).encode())
+
+
+def colors(name, schemes_dir=SCHEMES_DIR, cache=None, stat=None):
+    """Colors for one scheme, from the cache when fresh, otherwise parsed (and cached in memory)"""
+    if cache is None:
+        cache = load_cache(schemes_dir)
+    entry = cache["schemes"].get(name)
+    if stat is None:
+        st = os.stat(Path(schemes_dir) / f"{name}{SUFFIX}")
+        stat = [st.st_size, st.st_mtime_ns]
+    if entry is None or entry["stat"] != stat:
+        data = (Path(schemes_dir) / f"{name}{SUFFIX}").read_bytes()
+        entry = {"stat": stat, "colors": parse_scheme(data)}
+        cache["schemes"][name] = entry
+    return entry["colors"]
+
+
+def linearize(values):
+    """sRGB components -> linear light, for a flat list"""
+    return [v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4 for v in values]
+
+
+def luminances(triples):
+    """WCAG relative luminance for a list of RGB triples, computed in one pass"""
+    flat = linearize([c for rgb in triples for c in rgb])
+    return [0.2126 * flat[i] + 0.7152 * flat[i + 1] + 0.0722 * flat[i + 2]
+            for i in range(0, len(flat), 3)]
+
+
+def ratios(a, b):
+    """Elementwise WCAG contrast ratio between two luminance columns"""
+    return [(max(x, y) + 0.05) / (min(x, y) + 0.05) for x, y in zip(a, b)]
+
+
+def compute_metrics(schemes):
+    """Contrast metrics for many schemes at once
+
+    `schemes` maps name -> colors. Colors are laid out as columns (all backgrounds,
+    all foregrounds, each ANSI slot, ...) so every luminance and ratio is computed
+    by a single pass over a flat list rather than scheme by scheme.
+    """
+    names = [n for n, c in schemes.items() if "Background Color" in c and "Foreground Color" in c]
+    black = [0.0, 0.0, 0.0]
+
+    def column(key, fallback="Foreground Color"):
+        # A missing color falls back to the one iTerm2 would use instead
+        return luminances([schemes[n][key] if key in schemes[n]
+                           else schemes[n].get(fallback, black) for n in names])
+
+    bg = column("Background Color")
+    fg = column("Foreground Color")
+    fg_bg = ratios(fg, bg)
+    ansi = [ratios(column(key), bg) for key in ANSI_KEYS]
+    sel = ratios(column("Selected Text Color"), column("Selection Color", None))
+    has_selection = ["Selection Color" in schemes[n] for n in names]
+
+    metrics = {}
+    for i, name in enumerate(names):
+        pairs = {"Foreground Color": fg_bg[i]}
+        pairs.update((key, ansi[k][i]) for k, key in enumerate(ANSI_KEYS))
+        if has_selection[i]:
+            pairs["Selection Color"] = sel[i]
+        ansi_values = [ansi[k][i] for k in range(16)]
+        worst = min(pairs, key=pairs.get)
+        metrics[name] = {
+            "fg_bg": round(fg_bg[i], 2),
+            "ansi": [round(v, 2) for v in ansi_values],
+            "selection": round(sel[i], 2) if has_selection[i] else None,
+            "ansi_min": round(min(ansi_values), 2),
+            "ansi_mean": round(sum(ansi_values) / 16, 2),
+            "min": round(pairs[worst], 2),
+            "mean": round(sum(pairs.values()) / len(pairs), 2),
+            "worst": worst,
+        }
+    return metrics
+
+
+def refresh(schemes_dir=SCHEMES_DIR):
+    """Bring the cache for a schemes directory up to date and return its scheme entries
+
+    Only new or changed files are parsed; metrics are computed in one batch for
+    every scheme that lacks them, and stale entries are dropped.
+    """
+    cache = load_cache(schemes_dir)
+    stats = scan(schemes_dir)
+    entries = cache["schemes"]
+    changed = False
+
+    for name in list(entries):
+        if name not in stats:
+            del entries[name]
+            changed = True
+
+    for name, stat in stats.items():
+        entry = entries.get(name)
+        if entry is None or entry["stat"] != stat:
+            try:
+                colors(name, schemes_dir, cache, stat)
+            except (OSError, plistlib.InvalidFileException, ValueError):
+                entries[name] = {"stat": stat, "colors": {}}
+            changed = True
+
+    pending = {n: e["colors"] for n, e in entries.items() if "metrics" not in e}
+    if pending:
+        computed = compute_metrics(pending)
+        for name in pending:
+            entries[name]["metrics"] = computed.get(name)
+        changed = True
+
+    if changed:
+        cache["schemes"] = {n: entries[n] for n in stats}
+        save_cache(cache, schemes_dir)
+    return cache["schemes"]
+
+
+def readable(entries, min_contrast, metric="fg_bg"):
+    """Names of schemes whose metric meets the threshold"""
+    return [n for n, e in entries.items()
+            if e.get("metrics") and (e["metrics"].get(metric) or 0) >= min_contrast]
+
+
+def below_threshold(schemes_dir, names, min_contrast, metric="fg_bg"):
+    """Map each named scheme that fails the threshold to its metric value"""
+    entries = refresh(schemes_dir)
+    passing = set(readable(entries, min_contrast, metric))
+    return {name: entries[name]["metrics"].get(metric) or 0 for name in names
+            if name not in passing and (entries.get(name) or {}).get("metrics")}
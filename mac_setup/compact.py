@@ -0,0 +1,123 @@
+"""
+Inheritance compaction for generated dynamic profiles
+
+Generated profiles all repeat the same block of settings (font, scrollback,
+terminal type, bold/italic, bell). The compaction pass finds the keys whose value
+is identical in every profile, emits them once in a generated parent profile
+placed first in the file, and leaves each child with only what is unique to it
+(colors, paths, rules) plus `Dynamic Profile Parent Name` pointing at the parent.
+Compacting an already compacted file expands it first, so the pass is idempotent.
+
+Generated parents are recognised by their reserved Guid (mac-setup-<file>-base)
+and carry no Tags, so iTerm2 shows no extra tag submenu for them.
+"""
+
+import json
+
+from .state import atomic_write
+
+# Generated parents have Guid mac-setup-<group>-base
+BASE_GUID_PREFIX = "mac-setup-"
+BASE_GUID_SUFFIX = "-base"
+
+# Never hoisted into the parent: identity, menu grouping and switching rules
+NEVER_INHERITED = {
+    "Name",
+    "Guid",
+    "Dynamic Profile Parent Name",
+    "Dynamic Profile Parent GUID",
+    "Tags",
+    "Badge Text",
+    "Automatic Profile Switching",
+    "Bound Hosts",
+}
+
+
+def base_guid(group):
+    return f"{BASE_GUID_PREFIX}{group}{BASE_GUID_SUFFIX}"
+
+
+def is_base(profile):
+    guid = profile.get("Guid") or ""
+    return guid.startswith(BASE_GUID_PREFIX) and guid.endswith(BASE_GUID_SUFFIX)
+
+
+def inherited(parent):
+    """Keys a child inherits from a generated parent"""
+    return {k: v for k, v in parent.items() if k not in NEVER_INHERITED}
+
+
+def expand(profiles):
+    """Undo compaction: fold generated parents back into their children"""
+    parents = {p["Name"]: p for p in profiles if is_base(p)}
+    expanded = []
+    for profile in profiles:
+        if is_base(profile):
+            continue
+        parent = parents.get(profile.get("Dynamic Profile Parent Name"))
+        if parent is None:
+            expanded.append(profile)
+            continue
+        child = {**inherited(parent), **profile}
+        child["Dynamic Profile Parent Name"] = parent.get("Dynamic Profile Parent Name", "Default")
+        expanded.append(child)
+    return expanded
+
+
+def views(profiles):
+    """Map each child Guid to its effective settings, without generated parents"""
+    return {p.get("Guid"): p for p in expand(profiles)}
+
+
+def shared_keys(profiles):
+    """Keys present with the same value in every profile"""
+    first, rest = profiles[0], profiles[1:]
+    return [
+        key for key, value in first.items()
+        if key not in NEVER_INHERITED and all(key in p and p[key] == value for p in rest)
+    ]
+
+
+def compact_profiles(profiles, group):
+    """Return profiles with shared settings moved into a generated "<group> Base" parent"""
+    profiles = expand(profiles)
+    if len(profiles) < 2:
+        return profiles
+
+    original_parent = profiles[0].get("Dynamic Profile Parent Name", "Default")
+    if any(p.get("Dynamic Profile Parent Name", "Default") != original_parent for p in profiles):
+        return profiles
+    keys = shared_keys(profiles)
+    if not keys:
+        return profiles
+
+    parent_name = f"{group} Base"
+    parent = {
+        "Name": parent_name,
+        "Guid": base_guid(group),
+        "Dynamic Profile Parent Name": original_parent,
+    }
+    parent.update((key, profiles[0][key]) for key in keys)
+
+    children = []
+    for profile in profiles:
+        child = {k: v for k, v in profile.items() if k not in keys}
+        child["Dynamic Profile Parent Name"] = parent_name
+        children.append(child)
+    return [parent] + children
+
+
+def compact_file(path, before_write=None):
+    """Compact a DynamicProfiles JSON file in place; returns (bytes before, bytes after)
+
+    before_write, if given, is called once just before the file is rewritten.
+    """
+    raw = path.read_bytes()
+    data = json.loads(raw)
+    data["Profiles"] = compact_profiles(data.get("Profiles", []), path.stem)
+    out = (json.dumps(data, indent=2) + "\n").encode()
+    if out != raw:
+        if before_write:
+            before_write()
+        atomic_write(path, out)
+    return len(raw), len(out)
@@ -0,0 +1,129 @@
+"""
+Manifest-driven dotfile deployment
+
+Each dotfile is rendered from a template in mac_setup/templates and either owns
+the whole target file or a marker-delimited block inside it. The manifest records
+the hash of every rendered template together with the size/mtime of the file we
+last wrote, so a re-run where nothing changed only renders templates and stats
+targets - it never reads, rewrites or shells out.
+"""
+
+import re
+import time
+from string import Template
+
+from . import profile_switch
+from .paths import BACKUPS_DIR, HOME, STATE_DIR, TEMPLATES_DIR, Layout
+from .state import atomic_write, load_manifest, save_manifest, sha256, stat_signature
+
+MANIFEST_FILE = STATE_DIR / "dotfiles.json"
+
+# name -> target (relative to $HOME), template (or render function), and optional
+# managed block markers
+DOTFILES = {
+    "tmux.conf": {
+        "target": ".tmux.conf",
+        "template": "tmux.conf",
+    },
+    "zshrc": {
+        "target": ".zshrc",
+        "template": "zshrc.block",
+        "block": ("# >>> mac-setup >>>", "# <<< mac-setup <<<"),
+    },
+    "profile-switch.zsh": {
+        "target": ".mac-setup/profile-switch.zsh",
+        "render": lambda home: profile_switch.render_zsh(profile_switch.load_table(Layout(home))),
+    },
+    "profile-switch.tmux": {
+        "target": ".mac-setup/profile-switch.tmux",
+        "render": lambda home: profile_switch.render_tmux(Layout(home).state_dir / "profile-switch.zsh", home),
+    },
+}
+
+
+def render(name, home=HOME):
+    """Render the template for a dotfile"""
+    spec = DOTFILES[name]
+    if "render" in spec:
+        return spec["render"](home).encode()
+    text = (TEMPLATES_DIR / spec["template"]).read_text()
+    return Template(text).safe_substitute(HOME=str(home)).encode()
+
+
+def splice_block(existing, rendered, markers):
+    """Replace (or append) the managed block inside existing file content"""
+    start, end = (m.encode() for m in markers)
+    block = rendered.strip()
+    pattern = re.compile(re.escape(start) + rb".*?" + re.escape(end), re.S)
+    text, count = pattern.subn(lambda _: block, existing, count=1)
+    if count:
+        return text
+    if existing.strip():
+        return existing.rstrip(b"\n") + b"\n\n" + block + b"\n"
+    return block + b"\n"
+
+
+def desired_content(name, rendered, current):
+    """Return the full file content a dotfile should have"""
+    markers = DOTFILES[name].get("block")
+    if markers is None:
+        return rendered
+    return splice_block(current or b"", rendered, markers)
+
+
+def deploy(names=None, home=HOME, manifest_file=MANIFEST_FILE,
+           backups_dir=BACKUPS_DIR, dry_run=False, rendered=None):
+    """Bring dotfiles up to date, touching only the ones whose content differs
+
+    Returns a list of (name, target, status, backup) tuples where status is one of
+    "unchanged", "created", "updated" or "adopted" (already correct on disk, now tracked).
+    `rendered` may supply pre-rendered content by name instead of the templates.
+    """
+    manifest = load_manifest(manifest_file)
+    results = []
+    dirty = False
+
+    for name in names or DOTFILES:
+        target = home / DOTFILES[name]["target"]
+        content = rendered[name] if rendered and name in rendered else render(name, home)
+        rendered_hash = sha256(content)
+        signature = stat_signature(target)
+        entry = manifest.get(name)
+
+        # Fast path: same template output and the file is exactly as we left it
+        if (entry and entry.get("rendered") == rendered_hash
+                and entry.get("target") == str(target)
+                and signature is not None and entry.get("stat") == signature):
+            results.append((name, target, "unchanged", None))
+            continue
+
+        current = target.read_bytes() if signature is not None else None
+        desired = desired_content(name, content, current)
+        backup = None
+
+        if current == desired:
+            status = "adopted" if entry is None else "unchanged"
+        else:
+            status = "created" if current is None else "updated"
+            if dry_run:
+                results.append((name, target, status, None))
+                continue
+            if current is not None:
+                stamp = time.strftime("%Y%m%d-%H%M%S")
+                backup = backups_dir / "dotfiles" / f"{name}.{stamp}"
+                atomic_write(backup, current, mode=0o600)
+            atomic_write(target, desired)
+
+        if not dry_run:
+            manifest[name] = {
+                "target": str(target),
+                "rendered": rendered_hash,
+                "sha256": sha256(desired),
+                "stat": stat_signature(target),
+            }
+            dirty = True
+        results.append((name, target, status, backup))
+
+    if dirty:
+        save_manifest(manifest_file, manifest)
+    return results
@@ -0,0 +1,141 @@
+"""
+Shallow, sparse and concurrent fetching of external git dependencies
+
+Fresh checkouts are cloned with --depth 1 --filter=blob:none and, where only part
+of a repository is needed, a sparse checkout of just those paths. Existing
+checkouts fetch just the new tip (--depth 1, so they stay shallow) and move to
+it only if they have no local commits. All repositories are fetched in parallel
+and each result reports the bytes downloaded and the time taken.
+"""
+
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .paths import SCHEMES_CHECKOUT_DIR, TPM_DIR
+
+GIT = os.environ.get("MAC_SETUP_GIT", "git")
+
+REPOS = {
+    "tpm": {
+        "url": "https://github.com/tmux-plugins/tpm",
+        "dest": TPM_DIR,
+    },
+    "iterm2-color-schemes": {
+        "url": "https://github.com/mbadolato/iTerm2-Color-Schemes.git",
+        "dest": SCHEMES_CHECKOUT_DIR,
+        # Only the iTerm2 scheme files - no screenshots or other terminals' formats
+        "sparse": ["/schemes/*.itermcolors"],
+    },
+}
+
+
+class FetchError(Exception):
+    pass
+
+
+def git(*args, cwd=None):
+    """Run git, returning stdout and raising FetchError with stderr on failure"""
+    result = subprocess.run([GIT, *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise FetchError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout.strip()
+
+
+def objects_size(dest):
+    """Total size of a checkout's git object store in bytes"""
+    total = 0
+    for root, _, files in os.walk(Path(dest) / ".git" / "objects"):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def sparse_patterns(dest):
+    """Return the sparse-checkout patterns currently configured for a checkout"""
+    try:
+        text = (Path(dest) / ".git" / "info" / "sparse-checkout").read_text()
+    except FileNotFoundError:
+        return None
+    return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+
+def clone(spec):
+    """Shallow, blobless clone; sparse when the spec lists paths"""
+    dest = Path(spec["dest"])
+    args = ["clone", "--quiet", "--depth", "1", "--filter=blob:none"]
+    if spec.get("branch"):
+        args += ["--branch", spec["branch"]]
+    if spec.get("sparse"):
+        args.append("--no-checkout")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    git(*args, spec["url"], str(dest))
+
+    if spec.get("sparse"):
+        git("sparse-checkout", "set", "--no-cone", *spec["sparse"], cwd=dest)
+        git("checkout", "--quiet", cwd=dest)
+
+
+def update(spec):
+    """Fast-forward an existing checkout to the remote tip; returns True if HEAD moved"""
+    dest = Path(spec["dest"])
+    if spec.get("sparse") and sparse_patterns(dest) != spec["sparse"]:
+        git("sparse-checkout", "set", "--no-cone", *spec["sparse"], cwd=dest)
+
+    # A plain pull would deepen the shallow history with every update. The new
+    # tip is fetched at depth 1 instead, which cuts it off from HEAD, so
+    # "fast-forward only" is checked up front: HEAD must still be the
+    # last-fetched tip, i.e. there are no local commits to lose
+    before = git("rev-parse", "HEAD", cwd=dest)
+    if git("rev-parse", "@{upstream}", cwd=dest) != before:
+        raise FetchError(f"{dest} has local commits; not updating")
+    git("fetch", "--quiet", "--depth", "1", "origin", cwd=dest)
+    git("reset", "--quiet", "--keep", "@{upstream}", cwd=dest)
+    return git("rev-parse", "HEAD", cwd=dest) != before
+
+
+def fetch_repo(name, spec):
+    """Clone or update one repository and report what happened"""
+    dest = Path(spec["dest"])
+    started = time.monotonic()
+    size_before = 0
+    try:
+        if (dest / ".git").exists():
+            size_before = objects_size(dest)
+            action = "updated" if update(spec) else "unchanged"
+        elif dest.exists() and any(dest.iterdir()):
+            raise FetchError(f"{dest} exists but is not a git checkout")
+        else:
+            clone(spec)
+            action = "cloned"
+    except (FetchError, OSError) as e:
+        return {"name": name, "dest": dest, "action": "failed", "error": str(e),
+                "bytes": 0, "seconds": time.monotonic() - started}
+
+    return {"name": name, "dest": dest, "action": action, "error": None,
+            "bytes": max(objects_size(dest) - size_before, 0),
+            "seconds": time.monotonic() - started}
+
+
+def fetch_all(repos=None, names=None):
+    """Fetch the named repositories (default: all) concurrently"""
+    repos = REPOS if repos is None else repos
+    names = list(names or repos)
+    if not names:
+        return []
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        return list(pool.map(lambda n: fetch_repo(n, repos[n]), names))
+
+
+def format_size(num_bytes):
+    """Human readable byte count"""
+    for unit in ("B", "KB", "MB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
@@ -0,0 +1,56 @@
+"""
+Well-known locations used by the mac-setup scripts
+
+Everything lives under one root, normally the home directory. Set MAC_SETUP_ROOT
+to point the scripts somewhere else (a scratch directory, a build server), or build
+a Layout for any root to pass paths explicitly.
+"""
+
+import os
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+TEMPLATES_DIR = PACKAGE_DIR / "templates"
+
+
+class Layout:
+    """All mac-setup and iTerm2 locations under one root (home) directory"""
+
+    def __init__(self, home):
+        self.home = Path(home)
+
+        # Where mac-setup keeps its manifests, backups and caches
+        self.state_dir = self.home / ".mac-setup"
+        self.backups_dir = self.state_dir / "backups"
+
+        # Repositories with their own iTerm2 profile
+        self.repo_base_dir = self.home / "work" / "repo"
+
+        # External git checkouts
+        self.tpm_dir = self.home / ".tmux" / "plugins" / "tpm"
+        self.schemes_checkout_dir = self.home / ".iterm2-color-schemes"
+        self.schemes_dir = self.schemes_checkout_dir / "schemes"
+        # Manually downloaded iTerm2-Color-Schemes zip, used by the profile generators
+        self.downloaded_schemes_dir = self.home / "Downloads" / "iTerm2-Color-Schemes-master" / "schemes"
+
+        # iTerm2
+        self.iterm_support_dir = self.home / "Library" / "Application Support" / "iTerm2"
+        self.color_presets_dir = self.iterm_support_dir / "ColorPresets"
+        self.dynamic_profiles_dir = self.iterm_support_dir / "DynamicProfiles"
+        self.iterm_plist = self.home / "Library" / "Preferences" / "com.googlecode.iterm2.plist"
+
+
+HOME = Path(os.environ.get("MAC_SETUP_ROOT") or Path.home())
+DEFAULT = Layout(HOME)
+
+STATE_DIR = DEFAULT.state_dir
+BACKUPS_DIR = DEFAULT.backups_dir
+REPO_BASE_DIR = DEFAULT.repo_base_dir
+TPM_DIR = DEFAULT.tpm_dir
+SCHEMES_CHECKOUT_DIR = DEFAULT.schemes_checkout_dir
+SCHEMES_DIR = DEFAULT.schemes_dir
+DOWNLOADED_SCHEMES_DIR = DEFAULT.downloaded_schemes_dir
+ITERM_SUPPORT_DIR = DEFAULT.iterm_support_dir
+COLOR_PRESETS_DIR = DEFAULT.color_presets_dir
+DYNAMIC_PROFILES_DIR = DEFAULT.dynamic_profiles_dir
+ITERM_PLIST = DEFAULT.iterm_plist
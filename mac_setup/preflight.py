@@ -0,0 +1,226 @@
+"""
+Preflight validation for setup scripts
+
+A script declares everything it is going to need up front: paths, commands,
+writable locations, scheme names and iTerm2 plist keys. `run()` resolves them in
+one batched pass. Every distinct path is stat'ed once and concurrently, each
+schemes directory is listed once, and each plist is parsed once. All problems
+are then reported together, before any slow install or write starts.
+"""
+
+import os
+import plistlib
+import shutil
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .paths import (COLOR_PRESETS_DIR, DYNAMIC_PROFILES_DIR, HOME, ITERM_PLIST,
+                    SCHEMES_CHECKOUT_DIR, SCHEMES_DIR, STATE_DIR, TEMPLATES_DIR)
+from .presets import SUFFIX, scheme_file
+
+ERROR = "error"
+WARNING = "warning"
+MAX_WORKERS = 16
+
+
+def path(p, severity=ERROR, kind=None, hint=None):
+    """p must exist (kind "file" or "dir" to be specific)"""
+    return {"check": "path", "path": Path(p), "severity": severity, "kind": kind, "hint": hint}
+
+
+def command(name, severity=ERROR, hint=None):
+    """name must be on PATH"""
+    return {"check": "command", "name": name, "severity": severity, "hint": hint}
+
+
+def writable(p, severity=ERROR, hint=None):
+    """p, or the nearest existing parent it would be created in, must be writable"""
+    return {"check": "writable", "path": Path(p), "severity": severity, "hint": hint}
+
+
+def schemes(names, schemes_dir=SCHEMES_DIR, severity=ERROR, hint=None, skip_missing_dir=False):
+    """Every scheme name must resolve to a file (see presets.scheme_file)"""
+    return {"check": "schemes", "names": list(names), "dir": Path(schemes_dir),
+            "severity": severity, "hint": hint, "skip_missing_dir": skip_missing_dir}
+
+
+def plist(plist_path=ITERM_PLIST, keys=(), profiles=(), severity=ERROR, hint=None):
+    """The plist must be readable and contain the top-level keys and named profiles"""
+    return {"check": "plist", "path": Path(plist_path), "keys": list(keys),
+            "profiles": list(profiles), "severity": severity, "hint": hint}
+
+
+def stat_or_none(p):
+    try:
+        return os.stat(p)
+    except OSError:
+        return None
+
+
+def list_schemes(directory):
+    try:
+        with os.scandir(directory) as it:
+            return {e.name for e in it if e.name.endswith(SUFFIX)}
+    except OSError:
+        return None
+
+
+def load_plist(p):
+    try:
+        with open(p, 'rb') as f:
+            return plistlib.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        return e
+
+
+def parents(p):
+    """p followed by its ancestors, used to find where it would be created"""
+    return [p, *p.parents]
+
+
+def run(checks):
+    """Resolve all checks in one batch; returns a list of (severity, message)"""
+    stat_paths = set()
+    for c in checks:
+        if c["check"] == "path":
+            stat_paths.add(c["path"])
+        elif c["check"] == "writable":
+            stat_paths.update(parents(c["path"]))
+    commands = {c["name"] for c in checks if c["check"] == "command"}
+    scheme_dirs = {c["dir"] for c in checks if c["check"] == "schemes"}
+    plists = {c["path"] for c in checks if c["check"] == "plist"}
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        stat_jobs = {p: pool.submit(stat_or_none, p) for p in stat_paths}
+        which_jobs = {n: pool.submit(shutil.which, n) for n in commands}
+        dir_jobs = {d: pool.submit(list_schemes, d) for d in scheme_dirs}
+        plist_jobs = {p: pool.submit(load_plist, p) for p in plists}
+        stats = {p: job.result() for p, job in stat_jobs.items()}
+        found = {n: job.result() for n, job in which_jobs.items()}
+        listings = {d: job.result() for d, job in dir_jobs.items()}
+        loaded = {p: job.result() for p, job in plist_jobs.items()}
+
+    problems = []
+    for c in checks:
+        for message in evaluate(c, stats, found, listings, loaded):
+            if c["hint"]:
+                message += f" ({c['hint']})"
+            problems.append((c["severity"], message))
+    return problems
+
+
+def evaluate(c, stats, found, listings, loaded):
+    """Messages for one check, from the batched results"""
+    kind = c["check"]
+    if kind == "path":
+        st = stats[c["path"]]
+        if st is None:
+            return [f"Not found: {c['path']}"]
+        if c["kind"] == "dir" and not stat.S_ISDIR(st.st_mode):
+            return [f"Not a directory: {c['path']}"]
+        if c["kind"] == "file" and not stat.S_ISREG(st.st_mode):
+            return [f"Not a file: {c['path']}"]
+        return []
+
+    if kind == "command":
+        return [] if found[c["name"]] else [f"Command not found: {c['name']}"]
+
+    if kind == "writable":
+        for p in parents(c["path"]):
+            if stats[p] is not None:
+                return [] if os.access(p, os.W_OK) else [f"Not writable: {p}"]
+        return [f"No existing parent for {c['path']}"]
+
+    if kind == "schemes":
+        available = listings[c["dir"]]
+        if available is None:
+            return [] if c["skip_missing_dir"] else [f"Schemes directory not found: {c['dir']}"]
+        return [f"Scheme not found: {n}" for n in c["names"] if scheme_file(n, available) is None]
+
+    if kind == "plist":
+        data = loaded[c["path"]]
+        if data is None:
+            return [f"iTerm2 preferences not found: {c['path']}"]
+        if isinstance(data, Exception):
+            return [f"Cannot read {c['path']}: {data}"]
+        messages = [f"Missing key in {c['path'].name}: {key}" for key in c["keys"] if key not in data]
+        names = {p.get("Name") for p in data.get("New Bookmarks", [])}
+        messages += [f"No {name} profile found in {c['path'].name}"
+                     for name in c["profiles"] if name not in names]
+        return messages
+    raise ValueError(f"unknown check {kind}")
+
+
+def report(problems, checks, elapsed):
+    """Print every problem at once; returns True if nothing is an error"""
+    errors = [m for s, m in problems if s == ERROR]
+    warnings = [m for s, m in problems if s == WARNING]
+    for message in errors:
+        print(f"❌ {message}")
+    for message in warnings:
+        print(f"⚠️  {message}")
+    summary = f"{len(checks)} checks in {elapsed * 1000:.0f} ms"
+    if errors:
+        print(f"❌ Preflight failed: {len(errors)} error(s), {len(warnings)} warning(s) ({summary})")
+    else:
+        print(f"✓ Preflight passed{f' with {len(warnings)} warning(s)' if warnings else ''} ({summary})")
+    return not errors
+
+
+def check(checks):
+    """Run and report checks; returns True if the operation can go ahead"""
+    started = time.monotonic()
+    problems = run(checks)
+    return report(problems, checks, time.monotonic() - started)
+
+
+def dev_environment_checks(bundle=None):
+    """setup-dev-environment.sh, run once Homebrew and the Command Line Tools are installed"""
+    checks = [
+        command("git", WARNING if bundle else ERROR,
+                hint="needed to fetch TPM and the color schemes; run: xcode-select --install"),
+        path(TEMPLATES_DIR / "tmux.conf", kind="file"),
+        path(TEMPLATES_DIR / "zshrc.block", kind="file"),
+        writable(HOME / ".tmux.conf"),
+        writable(HOME / ".zshrc"),
+        writable(STATE_DIR),
+    ]
+    if bundle:
+        checks += [path(bundle, kind="file"), path(f"{bundle}.sha256", kind="file")]
+    return checks
+
+
+def iterm_profiles_checks():
+    """setup-iterm-profiles.sh"""
+    return [
+        command("brew", hint='install Homebrew first: /bin/bash -c "$(curl -fsSL '
+                             'https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"'),
+        command("git", hint="needed to fetch the color schemes for the repo profiles"),
+        command("defaults", WARNING, hint="existing profiles will not be updated"),
+        path("/usr/libexec/PlistBuddy", WARNING, kind="file",
+             hint="existing profiles will not be updated"),
+        writable(SCHEMES_CHECKOUT_DIR),
+        writable(DYNAMIC_PROFILES_DIR),
+        plist(severity=WARNING, hint="open iTerm2 once; key bindings will be skipped"),
+    ]
+
+
+def color_schemes_checks(names=()):
+    """install-dev-color-schemes.sh
+
+    Runs before the fetch, so scheme names are only checked against an existing
+    checkout, and a missing one is a warning: the fetch may still bring it in.
+    """
+    return [
+        command("git", hint="needed to fetch the color schemes"),
+        writable(SCHEMES_CHECKOUT_DIR),
+        writable(COLOR_PRESETS_DIR),
+        schemes(names, severity=WARNING, hint="it will be skipped if the fetch does not add it",
+                skip_missing_dir=True),
+        plist(severity=WARNING, hint="open iTerm2 once; keyboard shortcuts will be skipped"),
+    ]
+
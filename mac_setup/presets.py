@@ -0,0 +1,147 @@
+"""
+Install .itermcolors schemes into iTerm2's ColorPresets directory
+
+Scheme files are hardlinked from the color schemes checkout (zero copy, one
+metadata operation each) and only copied when the checkout lives on a different
+filesystem. Every installed file is recorded in a manifest so a re-run only
+links what changed and uninstall removes exactly what was installed.
+"""
+
+import errno
+import os
+import shutil
+
+from .paths import COLOR_PRESETS_DIR, SCHEMES_DIR, STATE_DIR
+from .state import load_manifest, save_manifest, stat_signature
+
+MANIFEST_FILE = STATE_DIR / "presets.json"
+SUFFIX = ".itermcolors"
+
+# errno values meaning "hardlinks are not possible here, copy instead"
+LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP}
+
+
+def scan(directory):
+    """Map file name -> DirEntry for the .itermcolors files in a directory"""
+    try:
+        with os.scandir(directory) as it:
+            return {e.name: e for e in it if e.name.endswith(SUFFIX) and e.is_file()}
+    except FileNotFoundError:
+        return {}
+
+
+def scheme_file(name, available):
+    """File name for a scheme name, trying the no-space variant as a fallback (None if neither exists)"""
+    for candidate in (name, name.replace(" ", "")):
+        file_name = candidate + SUFFIX
+        if file_name in available:
+            return file_name
+    return None
+
+
+def resolve(names, available):
+    """Resolve scheme names to file names
+
+    Returns (resolved, missing) where resolved is a list of file names.
+    """
+    resolved, missing = [], []
+    for name in names:
+        file_name = scheme_file(name, available)
+        if file_name is None:
+            missing.append(name)
+        else:
+            resolved.append(file_name)
+    return resolved, missing
+
+
+def signature(entry):
+    """Stat signature of a DirEntry used to detect changes"""
+    st = entry.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst (atomically replacing dst), copying across filesystems"""
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, tmp)
+        method = "link"
+    except OSError as e:
+        if e.errno not in LINK_FALLBACK_ERRNOS:
+            raise
+        shutil.copy2(src, tmp)
+        method = "copy"
+    os.replace(tmp, dst)
+    return method
+
+
+def is_current(record, src_entry, dst_entry):
+    """True if an installed file still matches its source and what we recorded"""
+    if record is None or dst_entry is None:
+        return False
+    if record["source"] != src_entry.path:
+        return False
+    if record["method"] == "link":
+        return dst_entry.inode() == src_entry.inode()
+    return (record["source_stat"] == signature(src_entry)
+            and record["dest_stat"] == signature(dst_entry))
+
+
+def sync(file_names, schemes_dir=SCHEMES_DIR, presets_dir=COLOR_PRESETS_DIR,
+         manifest_file=MANIFEST_FILE, exact=False):
+    """Install file_names, touching only the differences
+
+    Presets installed earlier stay installed unless exact is set, in which case
+    the installed set becomes exactly file_names. Returns a dict of lists:
+    installed, unchanged, removed and kept (files we installed earlier that were
+    modified since, so they are left alone).
+    """
+    manifest = load_manifest(manifest_file)
+    records = manifest.setdefault("files", {})
+    sources = scan(schemes_dir)
+    presets_dir.mkdir(parents=True, exist_ok=True)
+    installed = scan(presets_dir)
+    result = {"installed": [], "unchanged": [], "removed": [], "kept": []}
+    wanted = set(file_names)
+
+    for name in file_names:
+        src = sources[name]
+        if is_current(records.get(name), src, installed.get(name)):
+            result["unchanged"].append(name)
+            continue
+        dst = presets_dir / name
+        method = link_or_copy(src.path, dst)
+        records[name] = {
+            "source": src.path,
+            "method": method,
+            "source_stat": signature(src),
+            "dest_stat": stat_signature(dst),
+        }
+        result["installed"].append(name)
+
+    stale = sorted(set(records) - wanted) if exact else []
+    for name in stale:
+        record = records.pop(name)
+        dst = presets_dir / name
+        entry = installed.get(name)
+        if entry is None:
+            continue
+        if signature(entry) != record["dest_stat"]:
+            result["kept"].append(name)
+            continue
+        os.unlink(dst)
+        result["removed"].append(name)
+
+    if result["installed"] or stale:
+        save_manifest(manifest_file, manifest)
+    return result
+
+
+def uninstall(presets_dir=COLOR_PRESETS_DIR, manifest_file=MANIFEST_FILE):
+    """Remove every preset recorded in the manifest"""
+    return sync([], presets_dir=presets_dir, manifest_file=manifest_file, exact=True)
+
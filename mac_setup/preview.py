@@ -0,0 +1,193 @@
+"""
+Terminal preview of color schemes with 24-bit color swatches
+
+Each swatch shows a scheme's background and foreground, the 16 ANSI colors and a
+short code sample. Only the scheme names are read up front (one directory scan);
+a scheme is parsed (or taken from the catalog cache) and formatted the first time
+it scrolls onto the screen, so paging through hundreds of schemes stays instant.
+"""
+
+import os
+import sys
+
+from . import catalog
+
+ESC = "\x1b"
+RESET = f"{ESC}[0m"
+BLACK = [0.0, 0.0, 0.0]
+WHITE = [1.0, 1.0, 1.0]
+SWATCH_WIDTH = 72
+
+# (role, text) runs; roles map to the ANSI colors most themes use for them
+CODE_SAMPLE = [
+    [("comment", "  # Load a scheme and report its contrast")],
+    [("keyword", "  def "), ("function", "contrast"), ("fg", "(path: "), ("type", "Path"),
+     ("fg", ", limit="), ("number", "4.5"), ("fg", ") -> "), ("type", "bool"), ("fg", ":")],
+    [("fg", "      colors = "), ("function", "parse"), ("fg", "(path."), ("function", "read_bytes"),
+     ("fg", "())  "), ("comment", "# cached")],
+    [("keyword", "      if "), ("fg", "not colors: "), ("keyword", "raise "), ("error", "ValueError"),
+     ("fg", "("), ("string", "f\"bad scheme: {path}\""), ("fg", ")")],
+]
+SWATCH_HEIGHT = 3 + len(CODE_SAMPLE) + 1
+
+ROLES = {"comment": 8, "keyword": 5, "function": 4, "type": 6, "number": 3,
+         "string": 2, "error": 1}
+
+
+def rgb(color):
+    return tuple(round(max(0.0, min(1.0, c)) * 255) for c in color)
+
+
+def fg(color):
+    return f"{ESC}[38;2;%d;%d;%dm" % rgb(color)
+
+
+def bg(color):
+    return f"{ESC}[48;2;%d;%d;%dm" % rgb(color)
+
+
+def line(runs, background, width):
+    """One swatch line: colored runs on the background, padded to width"""
+    out, used = [bg(background)], 0
+    for color, text in runs:
+        text = text[:max(width - used, 0)]
+        out += [fg(color), text]
+        used += len(text)
+    out += [" " * (width - used), RESET]
+    return "".join(out)
+
+
+def swatch(name, colors, width=SWATCH_WIDTH, metrics=None):
+    """Formatted lines for one scheme"""
+    back = colors.get("Background Color", BLACK)
+    fore = colors.get("Foreground Color", WHITE)
+    ansi = [colors.get(key, fore) for key in catalog.ANSI_KEYS]
+
+    info = f"fg/bg {metrics['fg_bg']:.1f}:1 " if metrics else ""
+    lines = [line([(fore, f" {name}"[:width - len(info)].ljust(width - len(info))), (fore, info)],
+                  back, width)]
+    for row in (0, 8):
+        lines.append(line([(ansi[i], " ███") for i in range(row, row + 8)], back, width))
+    palette = {"fg": fore, **{role: ansi[i] for role, i in ROLES.items()}}
+    for runs in CODE_SAMPLE:
+        lines.append(line([(palette[role], text) for role, text in runs], back, width))
+    lines.append("")
+    return lines
+
+
+class Preview:
+    """Lazily formatted swatches for a list of scheme names"""
+
+    def __init__(self, names, schemes_dir, stats, cache, width=SWATCH_WIDTH):
+        self.names = names
+        self.schemes_dir = schemes_dir
+        self.stats = stats
+        self.cache = cache
+        self.width = width
+        self.rendered = {}
+        self.parsed = 0
+
+    def swatch(self, name):
+        if name not in self.rendered:
+            entry = self.cache["schemes"].get(name)
+            fresh = entry is not None and entry["stat"] == self.stats[name]
+            try:
+                colors = catalog.colors(name, self.schemes_dir, self.cache, self.stats[name])
+            except (OSError, ValueError) as e:
+                self.rendered[name] = [f"⚠️  {name}: unreadable ({e})", ""]
+                return self.rendered[name]
+            if not fresh:
+                self.parsed += 1
+            metrics = self.cache["schemes"][name].get("metrics") if fresh else None
+            self.rendered[name] = swatch(name, colors, self.width, metrics)
+        return self.rendered[name]
+
+    def page(self, start, count):
+        lines = []
+        for name in self.names[start:start + count]:
+            lines += self.swatch(name)
+        return lines
+
+    def save(self):
+        """Keep newly parsed schemes in the catalog cache"""
+        if self.parsed:
+            catalog.save_cache(self.cache, self.schemes_dir)
+
+
+def select(schemes_dir, patterns=(), sort=None, min_contrast=None, metric="fg_bg"):
+    """Scheme names (and their stats) matching the patterns, optionally filtered/sorted by contrast
+
+    Without sort or min_contrast nothing is parsed here.
+    """
+    stats = catalog.scan(schemes_dir)
+    names = list(stats)
+    if patterns:
+        lowered = [p.lower() for p in patterns]
+        names = [n for n in names if any(p in n.lower() for p in lowered)]
+    if sort or min_contrast is not None:
+        entries = catalog.refresh(schemes_dir)
+        value = lambda n, key: ((entries.get(n) or {}).get("metrics") or {}).get(key) or 0
+        if min_contrast is not None:
+            passing = set(catalog.readable(entries, min_contrast, metric))
+            names = [n for n in names if n in passing]
+        if sort:
+            names.sort(key=lambda n: value(n, sort), reverse=True)
+    return names, stats
+
+
+def write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def read_key(fd):
+    key = os.read(fd, 8).decode(errors="ignore")
+    return {f"{ESC}[A": "up", f"{ESC}[B": "down", f"{ESC}[5~": "pgup",
+            f"{ESC}[6~": "pgdn", f"{ESC}[H": "home", f"{ESC}[F": "end"}.get(key, key)
+
+
+def interactive(preview):
+    """Full-screen pager; only the schemes on screen are ever formatted"""
+    import termios
+    import tty
+
+    fd = sys.stdin.fileno()
+    old = termios.tcgetattr(fd)
+    top, total = 0, len(preview.names)
+    try:
+        tty.setcbreak(fd)
+        write(f"{ESC}[?1049h{ESC}[?25l")
+        while True:
+            rows = os.get_terminal_size().lines
+            per_page = max(1, (rows - 1) // SWATCH_HEIGHT)
+            top = max(0, min(top, total - per_page))
+            end = min(top + per_page, total)
+            status = (f" {top + 1}-{end} of {total}   j/k: scroll   space/b: page   "
+                      f"g/G: first/last   q: quit")
+            write(f"{ESC}[H{ESC}[2J" + "\r\n".join(preview.page(top, per_page))
+                  + f"{ESC}[{rows};1H{ESC}[7m{status}{RESET}")
+
+            key = read_key(fd)
+            if key in ("q", ESC):
+                break
+            if key in ("j", "down"):
+                top += 1
+            elif key in ("k", "up"):
+                top -= 1
+            elif key in (" ", "f", "pgdn"):
+                top += per_page
+            elif key in ("b", "pgup"):
+                top -= per_page
+            elif key in ("g", "home"):
+                top = 0
+            elif key in ("G", "end"):
+                top = total
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old)
+        write(f"{ESC}[?25h{ESC}[?1049l")
+
+
+def stream(preview):
+    """Non-interactive output: print swatches one at a time"""
+    for i in range(len(preview.names)):
+        write("\n".join(preview.page(i, 1)) + "\n")
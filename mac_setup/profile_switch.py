@@ -0,0 +1,182 @@
+"""
+Directory-driven iTerm2 profile switching for zsh and tmux
+
+Instead of one Automatic Profile Switching glob per repo, the Working Directory
+of every generated repo profile (RepoProfiles.json, written by
+rebuild-profiles.py) is compiled into a sorted prefix table that is baked into a
+small zsh file. Every path is stored with a trailing "/" and each entry knows the index of its nearest
+ancestor entry, so the lookup is a binary search for the greatest entry <= $PWD/
+followed by a walk up that ancestor chain (a trie over path components,
+flattened into arrays). The chpwd hook runs entirely inside the shell and only
+emits the SetProfile escape when the resolved profile actually changes.
+
+The tmux hook handles pane focus changes, where no cd happens: it re-resolves the
+focused pane's directory and writes the escape straight to the client tty. Both
+paths record the profile they switched to in the @mac_setup_profile tmux option,
+which is what the focus hook compares against.
+"""
+
+import json
+
+from .compact import expand
+from .paths import DEFAULT, HOME, STATE_DIR
+
+DEFAULT_PROFILE = "Default"
+REPO_PROFILES_FILE = "RepoProfiles.json"
+ZSH_FILE = STATE_DIR / "profile-switch.zsh"
+
+
+def compile_table(directories):
+    """Compile {directory: profile} into sorted (paths, profiles, parents) lists
+
+    Paths end in "/" so that "budget/" never matches inside "budget_claude/".
+    parents[i] is the 1-based index of the nearest ancestor entry (0 for none).
+    """
+    entries = sorted((f"{str(directory).rstrip('/')}/", profile) for directory, profile in directories.items())
+    paths = [path for path, _ in entries]
+    profiles = [profile for _, profile in entries]
+    parents = []
+    stack = []
+    for i, path in enumerate(paths, start=1):
+        while stack and not path.startswith(paths[stack[-1] - 1]):
+            stack.pop()
+        parents.append(stack[-1] if stack else 0)
+        stack.append(i)
+    return paths, profiles, parents
+
+
+def table_from_profiles(profiles):
+    """Table for the generated profiles that have a Working Directory"""
+    return compile_table({p["Working Directory"]: p["Name"] for p in expand(profiles)
+                          if p.get("Custom Directory") == "Yes" and p.get("Working Directory")})
+
+
+def load_table(layout=DEFAULT):
+    """Table for the repo profiles currently in layout's DynamicProfiles (empty if none)"""
+    try:
+        with open(layout.dynamic_profiles_dir / REPO_PROFILES_FILE, 'r') as f:
+            profiles = json.load(f).get("Profiles", [])
+    except (FileNotFoundError, ValueError, AttributeError):
+        profiles = []
+    return table_from_profiles(profiles)
+
+
+def lookup(table, directory, default=DEFAULT_PROFILE):
+    """Python twin of the generated zsh lookup"""
+    paths, profiles, parents = table
+    target = f"{directory.rstrip('/')}/"
+    lo, hi, i = 1, len(paths), 0
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if paths[mid - 1] > target:
+            hi = mid - 1
+        else:
+            i, lo = mid, mid + 1
+    while i > 0:
+        if target.startswith(paths[i - 1]):
+            return profiles[i - 1]
+        i = parents[i - 1]
+    return default
+
+
+def zsh_quote(value):
+    return "'" + str(value).replace("'", "'\\''") + "'"
+
+
+def zsh_array(name, values):
+    return f"typeset -ga {name}=(" + " ".join(zsh_quote(v) for v in values) + ")"
+
+
+def render_zsh(table=None, default=DEFAULT_PROFILE):
+    """The zsh file sourced from ~/.zshrc (and run by the tmux hook)
+
+    Defaults to the repo profiles currently installed (see load_table).
+    """
+    if table is None:
+        table = load_table()
+    paths, profiles, parents = table
+    return ZSH_TEMPLATE.format(
+        paths=zsh_array("_mac_setup_paths", paths),
+        profiles=zsh_array("_mac_setup_profiles", profiles),
+        parents=zsh_array("_mac_setup_parents", parents),
+        default=zsh_quote(default),
+    )
+
+
+def render_tmux(zsh_file=ZSH_FILE, home=HOME):
+    """The tmux snippet sourced from ~/.tmux.conf"""
+    return TMUX_TEMPLATE.format(zsh_file=str(zsh_file).replace(str(home), "~", 1))
+
+
+ZSH_TEMPLATE = r"""# Generated by mac-setup (./mac-setup dotfiles) - do not edit
+# iTerm2 profile switching by directory: sorted prefix table + binary search
+
+{paths}
+{profiles}
+{parents}
+typeset -g _mac_setup_default_profile={default}
+
+# Sets REPLY to the profile for a directory
+_mac_setup_profile_for() {{
+    emulate -L zsh
+    local dir="${{1%/}}/" prefix
+    integer lo=1 hi=${{#_mac_setup_paths}} mid i=0
+    while (( lo <= hi )); do
+        mid=$(( (lo + hi) / 2 ))
+        if [[ ${{_mac_setup_paths[mid]}} > $dir ]]; then
+            hi=$(( mid - 1 ))
+        else
+            i=$mid
+            lo=$(( mid + 1 ))
+        fi
+    done
+    while (( i > 0 )); do
+        prefix=${{_mac_setup_paths[i]}}
+        if [[ ${{dir[1,${{#prefix}}]}} == "$prefix" ]]; then
+            REPLY=${{_mac_setup_profiles[i]}}
+            return
+        fi
+        i=${{_mac_setup_parents[i]}}
+    done
+    REPLY=$_mac_setup_default_profile
+}}
+
+_mac_setup_switch_profile() {{
+    emulate -L zsh
+    local REPLY
+    _mac_setup_profile_for "$PWD"
+    [[ $REPLY == "$_mac_setup_current_profile" ]] && return
+    # Outside any repo: leave a manually chosen profile alone until we switched away from it
+    if [[ -z $_mac_setup_current_profile && $REPLY == "$_mac_setup_default_profile" ]]; then
+        _mac_setup_current_profile=$REPLY
+        return
+    fi
+    _mac_setup_current_profile=$REPLY
+    if [[ -n $TMUX ]]; then
+        printf '\ePtmux;\e\e]1337;SetProfile=%s\a\e\\' "$REPLY"
+        tmux set -g @mac_setup_profile "$REPLY"
+    else
+        printf '\e]1337;SetProfile=%s\a' "$REPLY"
+    fi
+}}
+
+if [[ $ZSH_EVAL_CONTEXT == toplevel && $1 == --tmux ]]; then
+    # tmux pane focus hook: profile-switch.zsh --tmux <pane path> <client tty> <last profile>
+    _mac_setup_profile_for "$2"
+    if [[ $REPLY != "$4" ]]; then
+        printf '\e]1337;SetProfile=%s\a' "$REPLY" > "$3"
+        tmux set -g @mac_setup_profile "$REPLY"
+    fi
+elif [[ -n $ITERM_SESSION_ID || $LC_TERMINAL == iTerm2 ]]; then
+    typeset -g _mac_setup_current_profile=""
+    autoload -Uz add-zsh-hook
+    add-zsh-hook chpwd _mac_setup_switch_profile
+    _mac_setup_switch_profile
+fi
+"""
+
+TMUX_TEMPLATE = """# Generated by mac-setup (./mac-setup dotfiles) - do not edit
+# Switch the iTerm2 profile when focus moves to a pane in another repo
+set -g focus-events on
+set-hook -g pane-focus-in 'run-shell -b "zsh {zsh_file} --tmux \\"#{{pane_current_path}}\\" \\"#{{client_tty}}\\" \\"#{{@mac_setup_profile}}\\""'
+"""
@@ -0,0 +1,306 @@
+"""
+Pure iTerm2 profile generation: scheme bytes in, profile dicts and JSON bytes out
+
+Nothing here reads the environment or touches the filesystem (apart from the
+optional `directory_source` helper): locations come from the Layout passed in,
+schemes from a `source` callable (name -> bytes), and GUIDs are derived from
+names, so the same inputs always produce the same bytes. Profile packs can be
+rendered headlessly on any OS, and for many users or machines in one process
+with `render_batch()`, together with the zsh/tmux hooks that switch to the
+rendered repo profiles.
+"""
+
+import json
+import plistlib
+import re
+import uuid
+from pathlib import PurePosixPath
+
+from . import compact, profile_switch
+from .catalog import COLOR_KEYS
+from .paths import Layout
+from .repos import REPO_SCHEMES
+
+# Target ids name output directories: no separators, no "..", no leading dot
+TARGET_ID_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+
+GUID_NAMESPACE = uuid.UUID("6f1d3f2e-5b7a-4c39-9a55-2f0e8c1d7b42")
+
+# Settings every generated profile gets
+PROFILE_SETTINGS = {
+    "Normal Font": "JetBrainsMono-Regular 13",
+    "Scrollback Lines": 100000,
+    "Unlimited Scrollback": False,
+    "Terminal Type": "xterm-256color",
+    "Use Bold Font": True,
+    "Use Bright Bold": True,
+    "Use Italic Font": True,
+    "Visual Bell": True,
+}
+
+# Recommended color schemes for code development (create-standalone-profiles.py)
+STANDALONE_SCHEMES = [
+    # Top Tier - Excellent for long coding sessions
+    "TokyoNight Storm",
+    "Catppuccin Mocha",
+    "Gruvbox Material Dark",
+    "Nord",
+    "Atom One Dark",
+
+    # High Contrast - Great visibility
+    "Dracula",
+    "Monokai Pro",
+    "Oceanic Next",
+    "Material Darker",
+
+    # Unique & Colorful
+    "Ayu Mirage",
+    "TokyoNight Moon",
+    "Snazzy",
+    "Material Ocean",
+
+    # Classics
+    "Solarized Dark Patched",
+    "Gruvbox Dark",
+    "Tomorrow Night",
+
+    # Additional good options
+    "TokyoNight Night",
+    "Catppuccin Frappe",
+    "Monokai Remastered",
+    "One Dark Two",
+]
+
+# Scheme -> profile name for the top-level color profiles (create-color-profiles-embedded.py)
+EMBEDDED_SCHEMES = {
+    "Dracula": "Dracula",
+    "Gruvbox Dark": "Gruvbox Dark",
+    "Nord": "Nord",
+    "Atom One Dark": "Atom One Dark",
+    "Solarized Dark Higher Contrast": "Solarized Dark",
+    "Monokai Remastered": "Monokai",
+    "TokyoNight": "Tokyo Night",
+    "Catppuccin Mocha": "Catppuccin",
+    "Pale Night Hc": "Palenight",
+    "Ayu": "Ayu",
+}
+
+
+class TargetError(Exception):
+    pass
+
+
+def load_scheme(data):
+    """Parse .itermcolors bytes"""
+    return plistlib.loads(data)
+
+
+def rgb_colors(scheme):
+    """The scheme's colors reduced to their RGB components"""
+    colors = {}
+    for key in COLOR_KEYS:
+        value = scheme.get(key)
+        if isinstance(value, dict):
+            colors[key] = {f"{c} Component": float(value.get(f"{c} Component", 0))
+                           for c in ("Red", "Green", "Blue")}
+    return colors
+
+
+def raw_colors(scheme):
+    """Every color entry exactly as the scheme defines it"""
+    return {key: value for key, value in scheme.items() if "Color" in key}
+
+
+def stable_guid(name):
+    return f"{name}-{uuid.uuid5(GUID_NAMESPACE, name)}"
+
+
+def repo_profile(repo_name, colors, layout):
+    """Profile for a repo under layout.repo_base_dir"""
+    profile = {
+        "Name": repo_name,
+        "Guid": stable_guid(repo_name),
+        "Dynamic Profile Parent Name": "Default",
+        "Custom Directory": "Yes",
+        "Working Directory": str(layout.repo_base_dir / repo_name),
+        "Bound Hosts": ["*"],
+        "Tags": ["repo", "auto-switch"],
+        "Badge Text": repo_name,
+        **PROFILE_SETTINGS,
+    }
+    # No Automatic Profile Switching rule: the generated zsh/tmux hooks
+    # (~/.mac-setup/profile-switch.*) switch profiles by directory
+    profile.update(colors)
+    return profile
+
+
+def standalone_profile(scheme_name, colors):
+    """Profile not tied to any directory, for manual or tmux/workmux use"""
+    profile = {
+        "Name": scheme_name,
+        # Embedded profiles share some of these names, and both packs can be installed together
+        "Guid": stable_guid(f"{scheme_name} (standalone)"),
+        "Dynamic Profile Parent Name": "Default",
+        "Tags": ["standalone", "code-dev"],
+        "Badge Text": scheme_name,
+        **PROFILE_SETTINGS,
+        "Silence Bell": True,
+    }
+    profile.update(colors)
+    return profile
+
+
+def embedded_profile(profile_name, colors):
+    """Top-level profile carrying a scheme's colors"""
+    profile = {
+        "Name": profile_name,
+        "Guid": stable_guid(profile_name),
+        "Dynamic Profile Parent Name": "Default",
+        **PROFILE_SETTINGS,
+    }
+    profile.update(colors)
+    return profile
+
+
+def pack_bytes(profiles, group):
+    """DynamicProfiles JSON, with shared settings in a generated "<group> Base" parent"""
+    data = {"Profiles": compact.compact_profiles(profiles, group)}
+    return (json.dumps(data, indent=2) + "\n").encode()
+
+
+def repo_pack(load, layout, mapping=REPO_SCHEMES):
+    profiles, missing = [], []
+    for repo_name, scheme_name in mapping.items():
+        scheme = load(scheme_name)
+        if scheme is None:
+            missing.append(scheme_name)
+            continue
+        profiles.append(repo_profile(repo_name, rgb_colors(scheme), layout))
+    return profiles, missing
+
+
+def standalone_pack(load, layout, names=STANDALONE_SCHEMES):
+    profiles, missing = [], []
+    for scheme_name in names:
+        scheme = load(scheme_name)
+        if scheme is None:
+            missing.append(scheme_name)
+            continue
+        profiles.append(standalone_profile(scheme_name, rgb_colors(scheme)))
+    return profiles, missing
+
+
+def embedded_pack(load, layout, names=EMBEDDED_SCHEMES):
+    profiles, missing = [], []
+    for scheme_name, profile_name in names.items():
+        scheme = load(scheme_name)
+        if scheme is None:
+            missing.append(scheme_name)
+            continue
+        profiles.append(embedded_profile(profile_name, raw_colors(scheme)))
+    return profiles, missing
+
+
+# pack name -> (DynamicProfiles file, builder)
+PACKS = {
+    "repos": ("RepoProfiles.json", repo_pack),
+    "standalone": ("CodeDevProfiles.json", standalone_pack),
+    "embedded": ("ColorProfiles.json", embedded_pack),
+}
+
+
+def memoized(source):
+    """Loader parsing each scheme from source (name -> bytes or None) at most once"""
+    parsed = {}
+
+    def load(name):
+        if name not in parsed:
+            data = source(name)
+            parsed[name] = load_scheme(data) if data is not None else None
+        return parsed[name]
+    return load
+
+
+def pack_profiles(pack, load, layout, selection=None):
+    """Build one pack for one layout; returns (path relative to home, profiles, missing schemes)"""
+    file_name, builder = PACKS[pack]
+    profiles, missing = builder(load, layout) if selection is None else builder(load, layout, selection)
+    path = (layout.dynamic_profiles_dir / file_name).relative_to(layout.home)
+    return path.as_posix(), profiles, missing
+
+
+def switch_hooks(profiles, layout):
+    """profile-switch.zsh and .tmux for a layout's repo profiles; {path relative to home: bytes}"""
+    zsh_file = layout.state_dir / "profile-switch.zsh"
+    tmux_file = layout.state_dir / "profile-switch.tmux"
+    table = profile_switch.table_from_profiles(profiles)
+    return {
+        zsh_file.relative_to(layout.home).as_posix(): profile_switch.render_zsh(table).encode(),
+        tmux_file.relative_to(layout.home).as_posix(): profile_switch.render_tmux(zsh_file, layout.home).encode(),
+    }
+
+
+def check_targets(targets):
+    """Validate batch targets, filling in defaults; returns a new list or raises TargetError"""
+    if not isinstance(targets, list):
+        raise TargetError("targets must be a JSON list")
+    checked, seen = [], set()
+    for i, target in enumerate(targets):
+        if not isinstance(target, dict):
+            raise TargetError(f"target #{i + 1} is not an object")
+        target_id = target.get("id")
+        if not isinstance(target_id, str) or not TARGET_ID_PATTERN.fullmatch(target_id):
+            raise TargetError(f"target #{i + 1}: id must be a plain name, got {target_id!r}")
+        if target_id in seen:
+            raise TargetError(f"duplicate target id {target_id!r}")
+        seen.add(target_id)
+
+        target = {"home": f"/Users/{target_id}", "packs": list(PACKS), **target}
+        if not isinstance(target["home"], str) or not target["home"].startswith("/"):
+            raise TargetError(f"{target_id}: home must be an absolute path")
+        if not isinstance(target["packs"], list) or not all(p in PACKS for p in target["packs"]):
+            raise TargetError(f"{target_id}: packs must be a list of {', '.join(PACKS)}")
+        for pack, kind in (("repos", dict), ("standalone", list), ("embedded", dict)):
+            if pack in target and not isinstance(target[pack], kind):
+                raise TargetError(f"{target_id}: {pack} must be a JSON {'object' if kind is dict else 'list'}")
+        checked.append(target)
+    return checked
+
+
+def render_batch(targets, source):
+    """Render profile packs for many users or machines in one process
+
+    Each target is a dict with "id", "home" and "packs" (names from PACKS), plus an
+    optional selection per pack under the pack's name (a repo -> scheme mapping for
+    "repos", a list of schemes for "standalone", a scheme -> name mapping for
+    "embedded"); see check_targets(). Targets with the "repos" pack also get the
+    zsh/tmux hooks that switch to those profiles. Every scheme is parsed once for
+    the whole batch.
+    Returns {id: {"files": {path relative to home: bytes}, "missing": [scheme names]}}.
+    """
+    load = memoized(source)
+    results = {}
+    for target in targets:
+        layout = Layout(target["home"])
+        files, missing = {}, set()
+        for pack in target["packs"]:
+            path, profiles, pack_missing = pack_profiles(pack, load, layout, target.get(pack))
+            files[path] = pack_bytes(profiles, PurePosixPath(path).stem)
+            missing.update(pack_missing)
+            if pack == "repos":
+                files.update(switch_hooks(profiles, layout))
+        results[target["id"]] = {"files": files, "missing": sorted(missing)}
+    return results
+
+
+def directory_source(directory, suffix=".itermcolors"):
+    """Scheme source reading <name>.itermcolors from a directory"""
+    def source(name):
+        if "/" in name or name.startswith("."):
+            return None
+        try:
+            with open(f"{directory}/{name}{suffix}", 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    return source
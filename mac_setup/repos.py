@@ -0,0 +1,17 @@
+"""
+Repositories that get their own color-coded iTerm2 profile
+"""
+
+# Repo to color scheme mappings (repos live under paths.REPO_BASE_DIR)
+REPO_SCHEMES = {
+    "mac-setup": "Solarized Dark Patched",
+    "transcript_extraction_dev": "Dracula",
+    "budget_claude": "Gruvbox Dark",
+    "budget_cursor": "Monokai Soda",
+    "budget_tracing": "Nord",
+    "budget": "Monokai Remastered",
+    "agentic_ai_learning": "Gruvbox Material Dark",
+    "intro-to-langsmith": "Dracula+",
+    "seafoam": "Seafoam Pastel",
+    "coding": "Tango Dark",
+}
@@ -0,0 +1,301 @@
+"""
+Snapshot store for iTerm2 preferences, used to roll back any mutating script
+
+A snapshot covers the `New Bookmarks` profiles and `GlobalKeyMap` entries of the
+iTerm2 plist plus every file in DynamicProfiles. State is split into units: one
+per profile Guid (in the plist and in each DynamicProfiles file), per key binding,
+and per DynamicProfiles file layout, so changing one profile in a large generated
+file stores just that profile. Files that are not DynamicProfiles JSON are kept
+as one unit. Each unit is stored once in a content-addressed, zlib-compressed
+object store, and a snapshot record only lists the units that changed since its
+parent. Every CHECKPOINT_INTERVAL
+snapshots a full unit map is written so restoring never walks a long chain.
+"""
+
+import json
+import os
+import plistlib
+import time
+import zlib
+
+from .paths import DYNAMIC_PROFILES_DIR, ITERM_PLIST, STATE_DIR
+from .state import atomic_write, sha256
+
+SNAPSHOTS_DIR = STATE_DIR / "snapshots"
+CHECKPOINT_INTERVAL = 50
+
+# JSON layouts tried when splitting a DynamicProfiles file, so it is restored
+# byte for byte; other files are restored with the first one
+JSON_FORMATS = [
+    {"indent": 2, "newline": True},
+    {"indent": 2, "newline": False},
+    {"indent": 4, "newline": True},
+    {"indent": 4, "newline": False},
+    {"indent": None, "newline": True},
+    {"indent": None, "newline": False},
+]
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def encode(value):
+    """Canonical bytes for a plist value"""
+    return plistlib.dumps(value, fmt=plistlib.FMT_BINARY, sort_keys=True)
+
+
+def capture(plist_path=ITERM_PLIST, dynamic_dir=DYNAMIC_PROFILES_DIR):
+    """Read current state as (units, meta), where units maps unit key -> bytes"""
+    units = {}
+    meta = {"plist": False, "keymap": False, "order": []}
+
+    try:
+        with open(plist_path, 'rb') as f:
+            prefs = plistlib.load(f)
+    except FileNotFoundError:
+        prefs = None
+
+    if prefs is not None:
+        meta["plist"] = True
+        for i, profile in enumerate(prefs.get("New Bookmarks", [])):
+            key = f"bookmark/{profile.get('Guid') or f'#{i}'}"
+            if key in units:
+                key = f"{key}#{i}"
+            units[key] = encode(profile)
+            meta["order"].append(key)
+        if "GlobalKeyMap" in prefs:
+            meta["keymap"] = True
+            for combo, action in prefs["GlobalKeyMap"].items():
+                units[f"keymap/{combo}"] = encode(action)
+
+    units.update(capture_dynamic(dynamic_dir))
+    return units, meta
+
+
+def dynamic_files(dynamic_dir=DYNAMIC_PROFILES_DIR):
+    """name -> bytes for every file in the DynamicProfiles directory"""
+    files = {}
+    try:
+        with os.scandir(dynamic_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith("."):
+                    with open(entry.path, 'rb') as f:
+                        files[entry.name] = f.read()
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def render_json(document, fmt):
+    return (json.dumps(document, indent=fmt["indent"]) + ("\n" if fmt["newline"] else "")).encode()
+
+
+def split_dynamic(name, data):
+    """Units for one DynamicProfiles file: a layout plus one unit per profile Guid
+
+    Anything that is not a JSON object with a list of profiles is one whole-file unit.
+    """
+    try:
+        document = json.loads(data)
+    except ValueError:
+        document = None
+    if not isinstance(document, dict) or not isinstance(document.get("Profiles"), list) \
+            or not all(isinstance(p, dict) for p in document["Profiles"]):
+        return {f"dynamic/{name}": data}
+
+    fmt = next((f for f in JSON_FORMATS if render_json(document, f) == data), JSON_FORMATS[0])
+    units, order = {}, []
+    for i, profile in enumerate(document["Profiles"]):
+        key = f"dynamic-profile/{name}/{profile.get('Guid') or f'#{i}'}"
+        if key in units:
+            key = f"{key}#{i}"
+        units[key] = json.dumps(profile).encode()
+        order.append(key)
+    layout = {"format": fmt, "document": {**document, "Profiles": order}}
+    units[f"dynamic-layout/{name}"] = json.dumps(layout).encode()
+    return units
+
+
+def capture_dynamic(dynamic_dir=DYNAMIC_PROFILES_DIR):
+    """Units for every file in the DynamicProfiles directory"""
+    units = {}
+    for name, data in dynamic_files(dynamic_dir).items():
+        units.update(split_dynamic(name, data))
+    return units
+
+
+def assemble_dynamic(store, units):
+    """name -> bytes for every DynamicProfiles file in a unit map"""
+    files = {}
+    for key, digest in units.items():
+        kind, name = key.split("/", 1)
+        if kind == "dynamic":
+            files[name] = get_object(store, digest)
+        elif kind == "dynamic-layout":
+            layout = json.loads(get_object(store, digest))
+            document = layout["document"]
+            document["Profiles"] = [json.loads(get_object(store, units[k])) for k in document["Profiles"]]
+            files[name] = render_json(document, layout["format"])
+    return files
+
+
+def object_path(store, digest):
+    return store / "objects" / digest[:2] / digest[2:]
+
+
+def put_object(store, data):
+    """Store bytes once by content hash and return the hash"""
+    digest = sha256(data)
+    path = object_path(store, digest)
+    if not path.exists():
+        atomic_write(path, zlib.compress(data), mode=0o600)
+    return digest
+
+
+def get_object(store, digest):
+    with open(object_path(store, digest), 'rb') as f:
+        return zlib.decompress(f.read())
+
+
+def record_path(store, snapshot_id):
+    return store / "records" / f"{snapshot_id:06d}.json"
+
+
+def load_record(store, snapshot_id):
+    try:
+        with open(record_path(store, snapshot_id), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise SnapshotError(f"No snapshot with id {snapshot_id}") from None
+
+
+def head(store):
+    """Id of the latest snapshot, or None"""
+    try:
+        return int((store / "HEAD").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def resolve(store, snapshot_id):
+    """Return (unit map, record) for a snapshot by replaying deltas from the last checkpoint"""
+    chain = []
+    record = load_record(store, snapshot_id)
+    target = record
+    while True:
+        chain.append(record)
+        if record.get("full") or record["parent"] is None:
+            break
+        record = load_record(store, record["parent"])
+
+    units = {}
+    for record in reversed(chain):
+        if record.get("full"):
+            units = dict(record["units"])
+        else:
+            units.update(record["changes"])
+            for key in record["removed"]:
+                units.pop(key, None)
+    return units, target
+
+
+def take(reason, store=SNAPSHOTS_DIR, plist_path=ITERM_PLIST, dynamic_dir=DYNAMIC_PROFILES_DIR):
+    """Snapshot the current state; returns the new id (or the latest id if nothing changed)"""
+    current, meta = capture(plist_path, dynamic_dir)
+    units = {key: put_object(store, data) for key, data in current.items()}
+
+    parent = head(store)
+    if parent is None:
+        previous, previous_record = {}, None
+    else:
+        previous, previous_record = resolve(store, parent)
+
+    changes = {k: v for k, v in units.items() if previous.get(k) != v}
+    removed = sorted(set(previous) - set(units))
+    if previous_record is not None and not changes and not removed and all(
+            previous_record[k] == meta[k] for k in meta):
+        return parent
+
+    snapshot_id = (parent or 0) + 1
+    record = {
+        "id": snapshot_id,
+        "parent": parent,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "reason": reason,
+        "changed": len(changes) + len(removed),
+        **meta,
+    }
+    if snapshot_id % CHECKPOINT_INTERVAL == 0:
+        record.update(full=True, units=units)
+    else:
+        record.update(changes=changes, removed=removed)
+
+    atomic_write(record_path(store, snapshot_id), json.dumps(record, indent=1).encode(), mode=0o600)
+    atomic_write(store / "HEAD", str(snapshot_id).encode(), mode=0o600)
+    return snapshot_id
+
+
+def take_and_report(reason):
+    """Take a snapshot and print how to undo the change that follows it"""
+    snapshot_id = take(reason)
+    print(f"Snapshot {snapshot_id} saved (undo with: ./mac-setup rollback {snapshot_id})")
+    return snapshot_id
+
+
+def history(store=SNAPSHOTS_DIR):
+    """All snapshot records, oldest first"""
+    try:
+        names = sorted(os.listdir(store / "records"))
+    except FileNotFoundError:
+        return []
+    return [load_record(store, int(name.split(".")[0])) for name in names if name.endswith(".json")]
+
+
+def restore(snapshot_id, store=SNAPSHOTS_DIR, plist_path=ITERM_PLIST,
+            dynamic_dir=DYNAMIC_PROFILES_DIR):
+    """Restore the state recorded in a snapshot, snapshotting the current state first
+
+    Returns (safety snapshot id, list of what was rewritten).
+    """
+    units, record = resolve(store, snapshot_id)
+    safety_id = take(f"before rollback to {snapshot_id}", store, plist_path, dynamic_dir)
+    written = []
+
+    # Plist: rebuild New Bookmarks and GlobalKeyMap, keep every other preference as is
+    if record["plist"]:
+        try:
+            with open(plist_path, 'rb') as f:
+                raw = f.read()
+            prefs = plistlib.loads(raw)
+        except FileNotFoundError:
+            raw, prefs = b"", {}
+        original = dict(prefs)
+
+        prefs["New Bookmarks"] = [plistlib.loads(get_object(store, units[k])) for k in record["order"]]
+        if record["keymap"]:
+            prefs["GlobalKeyMap"] = {
+                key.split("/", 1)[1]: plistlib.loads(get_object(store, digest))
+                for key, digest in units.items() if key.startswith("keymap/")
+            }
+        else:
+            prefs.pop("GlobalKeyMap", None)
+
+        if prefs != original:
+            fmt = plistlib.FMT_BINARY if raw.startswith(b"bplist") else plistlib.FMT_XML
+            atomic_write(plist_path, plistlib.dumps(prefs, fmt=fmt))
+            written.append(str(plist_path))
+
+    # DynamicProfiles: write files that differ, delete files the snapshot did not have
+    wanted = assemble_dynamic(store, units)
+    current = dynamic_files(dynamic_dir)
+    for name, data in wanted.items():
+        if current.get(name) != data:
+            atomic_write(dynamic_dir / name, data)
+            written.append(str(dynamic_dir / name))
+    for name in current:
+        if name not in wanted:
+            os.unlink(dynamic_dir / name)
+            written.append(f"removed {dynamic_dir / name}")
+
+    return safety_id, written
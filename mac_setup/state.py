@@ -0,0 +1,69 @@
+"""
+Manifest and atomic file helpers
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def sha256(data):
+    """Return the hex SHA-256 digest of bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def atomic_write(path, data, mode=None):
+    """Write bytes to path via a temp file and rename, so readers never see a partial file"""
+    path = Path(path)
+    if path.is_symlink():
+        # Keep symlinked dotfiles (e.g. from a dotfiles repo) pointing where they did
+        path = path.resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if mode is None:
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+
+def load_manifest(path):
+    """Load a JSON manifest, returning an empty one if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    """Atomically write a JSON manifest"""
+    data = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    atomic_write(path, data.encode())
+
+
+def stat_signature(path):
+    """Return (size, mtime_ns) for path, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
@@ -0,0 +1,256 @@
+"""
+Bidirectional sync between a DynamicProfiles JSON file and iTerm2 regular profiles
+
+Profiles are matched by Guid (regular profiles created by the older one-way
+scripts are adopted once by Name and the pairing is remembered; a pairing whose
+dynamic Guid disappears moves to a new, unpaired dynamic profile with the same
+Name, so regenerating a file never deletes and re-adds its regular profiles). For every
+matched profile a per-key three-way diff is computed between the dynamic
+profile, the regular profile and the values recorded at the last sync:
+
+- a key changed only on one side is copied to the other side
+- a key changed on both sides is a conflict, resolved by `prefer`
+
+Only changed keys are written, GUIDs are never regenerated, and each file is
+rewritten only when something in it actually changed.
+"""
+
+import json
+import plistlib
+
+from .compact import is_base, views
+from .paths import DYNAMIC_PROFILES_DIR, ITERM_PLIST, STATE_DIR
+from .state import atomic_write, load_manifest, save_manifest
+
+SYNC_STATE_DIR = STATE_DIR / "sync"
+DEFAULT_DYNAMIC_FILE = DYNAMIC_PROFILES_DIR / "ColorProfiles.json"
+
+# Keys that only make sense on the dynamic side (inheritance, auto-switching, tags);
+# they are never synced in either direction
+DYNAMIC_ONLY_KEYS = {
+    "Guid",
+    "Dynamic Profile Parent Name",
+    "Dynamic Profile Filename",
+    "Automatic Profile Switching",
+    "Custom Directory",
+    "Working Directory",
+    "Bound Hosts",
+    "Tags",
+    "Badge Text",
+    "Color Preset Name",
+}
+
+MISSING = object()
+
+
+def state_file(dynamic_file):
+    return SYNC_STATE_DIR / f"{dynamic_file.stem}.json"
+
+
+def synced_keys(dynamic, base):
+    """Keys taking part in the diff: those the dynamic profile defines or that were synced before
+
+    Keys that only exist on the regular profile (everything inherited from Default)
+    are not pushed into the sparse dynamic profile.
+    """
+    keys = set(dynamic) | set(base)
+    return sorted(keys - DYNAMIC_ONLY_KEYS)
+
+
+def merge_profile(dynamic, regular, base, direction, prefer):
+    """Three-way merge of one profile pair
+
+    Returns (to_regular, to_dynamic, new_base) where the first two map key -> value
+    (MISSING meaning delete the key).
+    """
+    to_regular, to_dynamic, new_base = {}, {}, {}
+    for key in synced_keys(dynamic, base):
+        d = dynamic.get(key, MISSING)
+        r = regular.get(key, MISSING)
+        b = base.get(key, MISSING)
+
+        if d == r:
+            winner = d
+        elif r == b:
+            winner = d
+        elif d == b:
+            winner = r
+        else:
+            winner = d if prefer == "dynamic" else r
+
+        if winner != r and direction != "to-dynamic":
+            to_regular[key] = winner
+            r = winner
+        if winner != d and direction != "to-regular":
+            to_dynamic[key] = winner
+            d = winner
+
+        # Only record keys that are now in agreement; anything held back stays pending
+        agreed = d if d == r else b
+        if agreed is not MISSING:
+            new_base[key] = agreed
+    return to_regular, to_dynamic, new_base
+
+
+def apply_changes(profile, changes):
+    for key, value in changes.items():
+        if value is MISSING:
+            profile.pop(key, None)
+        else:
+            profile[key] = value
+
+
+def new_regular_profile(dynamic, guid=None):
+    """Regular profile for a dynamic profile, keeping its Guid (or the one it was paired with)"""
+    profile = {k: v for k, v in dynamic.items() if k not in DYNAMIC_ONLY_KEYS}
+    profile["Guid"] = guid or dynamic["Guid"]
+    profile.setdefault("Custom Command", "No")
+    return profile
+
+
+def carry_over_pairs(pairs, dynamic_profiles, dynamic_guids, regular_by_guid):
+    """Move pairings of vanished dynamic Guids to unpaired dynamic profiles with the same Name"""
+    unpaired = {}
+    for dynamic in dynamic_profiles:
+        guid = dynamic.get("Guid")
+        if guid and guid not in pairs and not is_base(dynamic):
+            unpaired.setdefault(dynamic.get("Name"), guid)
+
+    pairs = dict(pairs)
+    for old_guid, pair in list(pairs.items()):
+        if old_guid in dynamic_guids:
+            continue
+        regular = regular_by_guid.get(pair["regular"])
+        names = [pair["values"].get("Name"), regular.get("Name") if regular else None]
+        new_guid = next((unpaired.pop(n) for n in names if n is not None and n in unpaired), None)
+        if new_guid is not None:
+            pairs[new_guid] = pairs.pop(old_guid)
+    return pairs
+
+
+def plan(dynamic_profiles, bookmarks, state, direction="both", prefer="dynamic"):
+    """Compute and apply a sync in memory
+
+    Mutates dynamic_profiles and bookmarks in place and returns (changes, new_state),
+    where changes is a list of (action, profile name, keys) describing what happened.
+    Children of a compacted file are compared using the settings they inherit from
+    its generated parent; only keys that actually change are written to the child.
+    """
+    new_pairs = {}
+    changes = []
+
+    regular_by_guid = {p.get("Guid"): p for p in bookmarks}
+    regular_by_name = {}
+    for p in bookmarks:
+        regular_by_name.setdefault(p.get("Name"), p)
+    effective = views(dynamic_profiles)
+    dynamic_guids = set(effective)
+    pairs = carry_over_pairs(state.get("profiles", {}), dynamic_profiles, dynamic_guids, regular_by_guid)
+    claimed = {pair["regular"] for pair in pairs.values()}
+
+    removed_dynamic = []
+    for dynamic in dynamic_profiles:
+        guid = dynamic.get("Guid")
+        if not guid or is_base(dynamic):
+            continue
+        view = effective[guid]
+        name = dynamic.get("Name", "Unnamed")
+        pair = pairs.get(guid)
+
+        if pair is not None:
+            regular = regular_by_guid.get(pair["regular"])
+            if regular is None and direction != "to-regular":
+                # Deleted from regular profiles since the last sync
+                removed_dynamic.append(dynamic)
+                changes.append(("removed from dynamic", name, []))
+                continue
+        else:
+            regular = regular_by_guid.get(guid)
+            if regular is None:
+                # Legacy regular copy created with a fresh Guid: adopt it once by name
+                candidate = regular_by_name.get(name)
+                if (candidate is not None and candidate.get("Guid") not in dynamic_guids
+                        and candidate.get("Guid") not in claimed):
+                    regular = candidate
+                    claimed.add(candidate.get("Guid"))
+
+        if regular is None:
+            if direction == "to-dynamic":
+                continue
+            # New, or deleted from regular profiles and re-added when syncing to-regular
+            regular_guid = pair["regular"] if pair else guid
+            regular = new_regular_profile(view, regular_guid)
+            bookmarks.append(regular)
+            regular_by_guid[regular_guid] = regular
+            new_pairs[guid] = {
+                "regular": regular_guid,
+                "values": {k: view[k] for k in synced_keys(view, {})},
+            }
+            changes.append(("added to regular", name, []))
+            continue
+
+        base = pair["values"] if pair else {}
+        to_regular, to_dynamic, new_base = merge_profile(view, regular, base, direction, prefer)
+        apply_changes(regular, to_regular)
+        apply_changes(dynamic, to_dynamic)
+        if to_regular:
+            changes.append(("updated regular", name, sorted(to_regular)))
+        if to_dynamic:
+            changes.append(("updated dynamic", name, sorted(to_dynamic)))
+        new_pairs[guid] = {"regular": regular.get("Guid"), "values": new_base}
+
+    for dynamic in removed_dynamic:
+        dynamic_profiles.remove(dynamic)
+
+    # Profiles removed from the dynamic file since the last sync
+    for guid, pair in pairs.items():
+        if guid in dynamic_guids:
+            continue
+        regular = regular_by_guid.get(pair["regular"])
+        if regular is None:
+            continue
+        if direction == "to-dynamic":
+            new_pairs[guid] = pair
+            continue
+        bookmarks.remove(regular)
+        changes.append(("removed from regular", regular.get("Name", "Unnamed"), []))
+
+    return changes, {"profiles": new_pairs}
+
+
+def sync(dynamic_file=DEFAULT_DYNAMIC_FILE, plist_path=ITERM_PLIST, direction="both",
+         prefer="dynamic", dry_run=False, before_write=None):
+    """Sync a dynamic profiles file with the regular profiles in the iTerm2 plist
+
+    `before_write` is called (once) right before any file is modified.
+    Returns the list of changes.
+    """
+    with open(dynamic_file, 'r') as f:
+        dynamic_data = json.load(f)
+    with open(plist_path, 'rb') as f:
+        raw = f.read()
+    prefs = plistlib.loads(raw)
+
+    dynamic_profiles = dynamic_data.setdefault("Profiles", [])
+    bookmarks = prefs.setdefault("New Bookmarks", [])
+    dynamic_before = json.dumps(dynamic_data, sort_keys=True)
+    bookmarks_before = plistlib.dumps(bookmarks, sort_keys=True)
+
+    state_path = state_file(dynamic_file)
+    state = load_manifest(state_path)
+    changes, new_state = plan(dynamic_profiles, bookmarks, state, direction, prefer)
+    if dry_run:
+        return changes
+
+    dynamic_changed = json.dumps(dynamic_data, sort_keys=True) != dynamic_before
+    regular_changed = plistlib.dumps(bookmarks, sort_keys=True) != bookmarks_before
+    if (dynamic_changed or regular_changed) and before_write is not None:
+        before_write()
+    if regular_changed:
+        fmt = plistlib.FMT_BINARY if raw.startswith(b"bplist") else plistlib.FMT_XML
+        atomic_write(plist_path, plistlib.dumps(prefs, fmt=fmt))
+    if dynamic_changed:
+        atomic_write(dynamic_file, (json.dumps(dynamic_data, indent=2) + "\n").encode())
+    if new_state != state:
+        save_manifest(state_path, new_state)
+    return changes
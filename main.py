@@ -1,6 +1,405 @@
-def main():
-    print("Hello from mac-setup!")
+#!/usr/bin/env python3
+"""
+mac-setup command line entry point
+"""
+
+import argparse
+import sys
+
+
+def cmd_dotfiles(args):
+    """Deploy managed dotfiles"""
+    from mac_setup import dotfiles
+
+    unknown = [n for n in args.names if n not in dotfiles.DOTFILES]
+    if unknown:
+        print(f"❌ Unknown dotfile(s): {', '.join(unknown)}")
+        print(f"   Known: {', '.join(dotfiles.DOTFILES)}")
+        return 1
+
+    results = dotfiles.deploy(args.names or None, dry_run=args.dry_run)
+    for name, target, status, backup in results:
+        if status == "unchanged":
+            print(f"✓ {target} is already up to date")
+        elif args.dry_run:
+            print(f"• {target} would be {status}")
+        elif status == "adopted":
+            print(f"✓ {target} already matches, now tracked")
+        else:
+            print(f"✓ {status.capitalize()} {target}")
+            if backup:
+                print(f"  backup: {backup}")
+    return 0
+
+
+def cmd_fetch(args):
+    """Clone or fast-forward external git dependencies"""
+    from mac_setup import gitfetch
+
+    unknown = [n for n in args.names if n not in gitfetch.REPOS]
+    if unknown:
+        print(f"❌ Unknown repository: {', '.join(unknown)}")
+        print(f"   Known: {', '.join(gitfetch.REPOS)}")
+        return 1
+
+    failed = 0
+    for r in gitfetch.fetch_all(names=args.names):
+        if r["action"] == "failed":
+            failed += 1
+            print(f"❌ {r['name']}: {r['error']}")
+            continue
+        print(f"✓ {r['name']}: {r['action']} in {r['seconds']:.1f}s "
+              f"({gitfetch.format_size(r['bytes'])} downloaded) → {r['dest']}")
+    return 1 if failed else 0
+
+
+def cmd_presets(args):
+    """Install or uninstall ColorPresets from the color schemes checkout"""
+    from mac_setup import presets
+    from mac_setup.paths import SCHEMES_DIR
+
+    if args.action == "uninstall":
+        result = presets.uninstall()
+    else:
+        available = presets.scan(SCHEMES_DIR)
+        if not available:
+            print(f"❌ No schemes found in {SCHEMES_DIR} (run ./mac-setup fetch first)")
+            return 1
+        if args.all:
+            file_names = sorted(available)
+        else:
+            file_names, missing = presets.resolve(args.names, available)
+            for name in missing:
+                print(f"⚠ Not found: {name}")
+            if missing and args.exact:
+                print("❌ Not replacing the installed presets while names are missing")
+                return 1
+        if not file_names:
+            print("❌ No schemes to install (name them, or pass --all)")
+            return 1
+        result = presets.sync(file_names, exact=args.exact)
+
+    for name in result["installed"]:
+        print(f"✓ Installed: {name[:-len(presets.SUFFIX)]}")
+    for name in result["removed"]:
+        print(f"✓ Removed: {name[:-len(presets.SUFFIX)]}")
+    for name in result["kept"]:
+        print(f"⚠ Left modified preset in place: {name}")
+    print(f"{len(result['installed'])} installed, {len(result['unchanged'])} unchanged, "
+          f"{len(result['removed'])} removed")
+    return 0
+
+
+def cmd_snapshot(args):
+    """Snapshot iTerm2 profiles, key bindings and dynamic profiles"""
+    from mac_setup import snapshots
+
+    snapshot_id = snapshots.take(args.message)
+    print(f"✓ Snapshot {snapshot_id} (undo with: ./mac-setup rollback {snapshot_id})")
+    return 0
+
+
+def cmd_snapshots(args):
+    """List snapshots"""
+    from mac_setup import snapshots
+
+    records = snapshots.history()
+    if not records:
+        print("No snapshots yet")
+    for r in records:
+        print(f"{r['id']:>5}  {r['created']}  {r['changed']:>4} changed  {r['reason']}")
+    return 0
+
+
+def cmd_rollback(args):
+    """Restore a snapshot"""
+    from mac_setup import snapshots
+
+    try:
+        safety_id, written = snapshots.restore(args.id)
+    except snapshots.SnapshotError as e:
+        print(f"❌ {e}")
+        return 1
+
+    for path in written:
+        print(f"✓ {path}")
+    if not written:
+        print("✓ Already at that state")
+    print(f"Rolled back to snapshot {args.id} (previous state saved as snapshot {safety_id})")
+    print("Restart iTerm2 to pick up the restored profiles.")
+    return 0
+
+
+def cmd_sync(args):
+    """Sync a DynamicProfiles file with regular iTerm2 profiles"""
+    from pathlib import Path
+    from mac_setup import snapshots, sync
+    from mac_setup.paths import DYNAMIC_PROFILES_DIR
+
+    dynamic_file = Path(args.file) if args.file else sync.DEFAULT_DYNAMIC_FILE
+    if not dynamic_file.is_absolute() and not dynamic_file.exists():
+        dynamic_file = DYNAMIC_PROFILES_DIR / dynamic_file
+
+    try:
+        changes = sync.sync(dynamic_file, direction=args.direction, prefer=args.prefer, dry_run=args.dry_run,
+                            before_write=lambda: snapshots.take_and_report(f"sync {dynamic_file.name}"))
+    except FileNotFoundError as e:
+        print(f"❌ Not found: {e.filename}")
+        return 1
+
+    for action, name, keys in changes:
+        detail = f": {', '.join(keys)}" if keys else ""
+        print(f"{'•' if args.dry_run else '✓'} {action} '{name}'{detail}")
+    if not changes:
+        print("✓ Already in sync")
+    return 0
+
+
+def cmd_compact(args):
+    """Hoist settings shared by all profiles in a file into a generated parent"""
+    from pathlib import Path
+    from mac_setup import compact, snapshots
+
+    for name in args.files:
+        path = Path(name)
+        try:
+            before, after = compact.compact_file(
+                path, before_write=lambda: snapshots.take_and_report(f"compact {path.name}"))
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+            return 1
+        print(f"✓ Compacted {path.name}: {before:,} → {after:,} bytes")
+    return 0
+
+
+def cmd_schemes(args):
+    """List schemes with their contrast metrics, filtered and sorted from the cache"""
+    from pathlib import Path
+    from mac_setup import catalog
+    from mac_setup.paths import SCHEMES_DIR
+
+    schemes_dir = Path(args.dir) if args.dir else SCHEMES_DIR
+    entries = catalog.refresh(schemes_dir)
+    if not entries:
+        print(f"❌ No schemes in {schemes_dir} (run: ./mac-setup fetch iterm2-color-schemes)")
+        return 1
+
+    rows = [(name, e["metrics"]) for name, e in entries.items() if e.get("metrics")]
+    if args.min_contrast is not None:
+        passing = set(catalog.readable(entries, args.min_contrast, args.metric))
+        rows = [(n, m) for n, m in rows if n in passing]
+    if args.sort != "name":
+        rows.sort(key=lambda row: row[1].get(args.sort) or 0, reverse=True)
+    if args.limit:
+        rows = rows[:args.limit]
+
+    print(f"{'Scheme':<36} {'fg/bg':>6} {'ansi min':>8} {'ansi avg':>8} {'select':>6}  worst pair")
+    for name, m in rows:
+        selection = f"{m['selection']:.2f}" if m.get("selection") is not None else "-"
+        print(f"{name[:36]:<36} {m['fg_bg']:>6.2f} {m['ansi_min']:>8.2f} {m['ansi_mean']:>8.2f} "
+              f"{selection:>6}  {m['worst']} ({m['min']:.2f}:1)")
+    print(f"\n{len(rows)} of {len(entries)} schemes")
+    return 0
+
+
+def cmd_bundle(args):
+    """Build an offline provisioning bundle, or provision from one"""
+    from pathlib import Path
+    from mac_setup import bundle, gitfetch
+
+    if args.action == "build":
+        print("Collecting git checkouts, Homebrew downloads, dotfiles and profiles...")
+        try:
+            archive = bundle.build(args.output, args.version, include_brew=not args.no_brew)
+        except (bundle.BundleError, gitfetch.FetchError, OSError) as e:
+            print(f"❌ Bundle build failed: {e}")
+            return 1
+        print(f"✓ Built {archive} ({gitfetch.format_size(archive.stat().st_size)})")
+        print(f"  checksum: {archive.name}.sha256")
+        return 0
+
+    if not args.archive:
+        print("❌ bundle apply needs an archive")
+        return 1
+    try:
+        results = bundle.apply(Path(args.archive), include_brew=not args.no_brew)
+    except (bundle.BundleError, gitfetch.FetchError, OSError) as e:
+        print(f"❌ Bundle apply failed: {e}")
+        return 1
+    for kind, name, status in results:
+        mark = "⚠️ " if status.startswith("skipped") else "✓"
+        print(f"{mark} {kind} {name}: {status}")
+    return 0
+
+
+def cmd_preview(args):
+    """Page through color scheme swatches in the terminal"""
+    import os
+    import sys
+    from pathlib import Path
+    from mac_setup import catalog, preview
+    from mac_setup.paths import SCHEMES_DIR
+
+    schemes_dir = Path(args.dir) if args.dir else SCHEMES_DIR
+    names, stats = preview.select(schemes_dir, args.patterns, args.sort, args.min_contrast, args.metric)
+    if not names:
+        print(f"❌ No matching schemes in {schemes_dir}")
+        return 1
+
+    width = preview.SWATCH_WIDTH
+    if sys.stdout.isatty():
+        width = min(width, os.get_terminal_size().columns)
+    pager = preview.Preview(names, schemes_dir, stats, catalog.load_cache(schemes_dir), width)
+    try:
+        if sys.stdin.isatty() and sys.stdout.isatty() and not args.no_pager:
+            preview.interactive(pager)
+        else:
+            preview.stream(pager)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        pager.save()
+    return 0
+
+
+def cmd_preflight(args):
+    """Check everything an operation needs before it starts"""
+    from mac_setup import preflight
+
+    if args.operation == "dev-environment":
+        checks = preflight.dev_environment_checks(args.bundle)
+    elif args.operation == "color-schemes":
+        checks = preflight.color_schemes_checks(args.schemes)
+    else:
+        checks = preflight.iterm_profiles_checks()
+    return 0 if preflight.check(checks) else 1
+
+
+def cmd_profiles(args):
+    """Render DynamicProfiles packs for many users or machines in one run"""
+    import json
+    from pathlib import Path
+    from mac_setup import profiles
+    from mac_setup.state import atomic_write
+
+    try:
+        targets = profiles.check_targets(json.loads(Path(args.targets).read_text()))
+    except (OSError, ValueError) as e:
+        print(f"❌ {args.targets}: {e}")
+        return 1
+    except profiles.TargetError as e:
+        print(f"❌ Bad target in {args.targets}: {e}")
+        return 1
+    if not Path(args.schemes).is_dir():
+        print(f"❌ Schemes directory not found: {args.schemes}")
+        return 1
+    results = profiles.render_batch(targets, profiles.directory_source(args.schemes))
+
+    output = Path(args.output)
+    for target_id, result in results.items():
+        for relpath, data in result["files"].items():
+            atomic_write(output / target_id / relpath, data)
+        print(f"✓ {target_id}: {len(result['files'])} file(s)")
+        for name in result["missing"]:
+            print(f"  ⚠️  Scheme not found: {name}")
+    return 0
+
+
+def build_parser():
+    from mac_setup.catalog import METRICS
+    from mac_setup.paths import DOWNLOADED_SCHEMES_DIR
+
+    parser = argparse.ArgumentParser(prog="mac-setup", description="Mac setup tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("dotfiles", help="deploy managed dotfiles (~/.tmux.conf, ~/.zshrc block, profile switching hooks)")
+    p.add_argument("names", nargs="*", help="dotfiles to deploy (default: all)")
+    p.add_argument("--dry-run", action="store_true", help="report what would change")
+    p.set_defaults(func=cmd_dotfiles)
+
+    p = sub.add_parser("fetch", help="shallow/sparse clone or fast-forward external git repos")
+    p.add_argument("names", nargs="*", help="repositories to fetch (default: all)")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("presets", help="sync iTerm2 ColorPresets with the schemes checkout")
+    p.add_argument("action", choices=["install", "uninstall"])
+    p.add_argument("names", nargs="*", help="scheme names to install")
+    p.add_argument("--all", action="store_true", help="install the entire catalog")
+    p.add_argument("--exact", action="store_true",
+                   help="also remove presets we installed earlier that are not named")
+    p.set_defaults(func=cmd_presets)
+
+    p = sub.add_parser("snapshot", help="snapshot iTerm2 profiles and key bindings")
+    p.add_argument("-m", "--message", default="manual", help="why the snapshot was taken")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("snapshots", help="list snapshots")
+    p.set_defaults(func=cmd_snapshots)
+
+    p = sub.add_parser("rollback", help="restore iTerm2 profiles and key bindings from a snapshot")
+    p.add_argument("id", type=int, help="snapshot id (see: mac-setup snapshots)")
+    p.set_defaults(func=cmd_rollback)
+
+    p = sub.add_parser("sync", help="sync a DynamicProfiles file with regular iTerm2 profiles")
+    p.add_argument("file", nargs="?", help="dynamic profiles file (default: ColorProfiles.json)")
+    p.add_argument("--direction", choices=["both", "to-regular", "to-dynamic"], default="both")
+    p.add_argument("--prefer", choices=["dynamic", "regular"], default="dynamic",
+                   help="which side wins when a key changed on both sides")
+    p.add_argument("--dry-run", action="store_true", help="report what would change")
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("compact", help="move settings shared by generated profiles into a parent")
+    p.add_argument("files", nargs="+", help="DynamicProfiles JSON files")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("schemes", help="list color schemes with WCAG contrast metrics")
+    p.add_argument("--min-contrast", type=float, metavar="RATIO",
+                   help="only schemes whose --metric is at least RATIO (e.g. 4.5 for WCAG AA)")
+    p.add_argument("--metric", choices=METRICS, default="fg_bg",
+                   help="metric used by --min-contrast (default: fg_bg)")
+    p.add_argument("--sort", choices=["name"] + METRICS, default="name")
+    p.add_argument("--limit", type=int, help="show at most this many schemes")
+    p.add_argument("--dir", help="schemes directory (default: the iterm2-color-schemes checkout)")
+    p.set_defaults(func=cmd_schemes)
+
+    p = sub.add_parser("bundle", help="build or apply an offline provisioning bundle")
+    p.add_argument("action", choices=["build", "apply"])
+    p.add_argument("archive", nargs="?", help="bundle to apply")
+    p.add_argument("-o", "--output", default=".", help="directory for the built bundle (default: .)")
+    p.add_argument("--version", help="bundle version (default: a timestamp)")
+    p.add_argument("--no-brew", action="store_true", help="leave out Homebrew packages")
+    p.set_defaults(func=cmd_bundle)
+
+    p = sub.add_parser("preview", help="preview color schemes as 24-bit swatches in the terminal")
+    p.add_argument("patterns", nargs="*", help="only schemes whose name contains one of these")
+    p.add_argument("--sort", choices=METRICS, help="sort by a contrast metric (highest first)")
+    p.add_argument("--min-contrast", type=float, metavar="RATIO",
+                   help="only schemes whose --metric is at least RATIO")
+    p.add_argument("--metric", choices=METRICS, default="fg_bg",
+                   help="metric used by --min-contrast (default: fg_bg)")
+    p.add_argument("--no-pager", action="store_true", help="print all swatches instead of paging")
+    p.add_argument("--dir", help="schemes directory (default: the iterm2-color-schemes checkout)")
+    p.set_defaults(func=cmd_preview)
+
+    p = sub.add_parser("preflight", help="report everything an operation is missing, all at once")
+    p.add_argument("operation", choices=["dev-environment", "iterm-profiles", "color-schemes"])
+    p.add_argument("--schemes", nargs="*", default=[], help="scheme names the operation will install")
+    p.add_argument("--bundle", help="offline bundle the operation will apply")
+    p.set_defaults(func=cmd_preflight)
+
+    p = sub.add_parser("profiles", help="render DynamicProfiles files for many users or machines at once")
+    p.add_argument("targets", help='JSON list of targets: [{"id": ..., "home": ..., "packs": [...]}, ...]')
+    p.add_argument("--schemes", default=str(DOWNLOADED_SCHEMES_DIR), help="directory of .itermcolors files")
+    p.add_argument("-o", "--output", default="profiles-out", help="write <output>/<id>/<path under home> (default: profiles-out)")
+    p.set_defaults(func=cmd_profiles)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
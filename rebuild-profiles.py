@@ -3,135 +3,88 @@
 Rebuild iTerm2 profiles with full color schemes from .itermcolors files
 """
 
-import json
-import plistlib
-import os
+import argparse
 from pathlib import Path
 
-# Paths
-REPO_BASE_DIR = Path.home() / "work" / "repo"
-DYNAMIC_PROFILES_DIR = Path.home() / "Library" / "Application Support" / "iTerm2" / "DynamicProfiles"
-SCHEMES_DIR = Path.home() / "Downloads" / "iTerm2-Color-Schemes-master" / "schemes"
-
-# Repo to color scheme mappings
-REPO_SCHEMES = {
-    "mac-setup": "Solarized Dark Patched",
-    "transcript_extraction_dev": "Dracula",
-    "budget_claude": "Gruvbox Dark",
-    "budget_cursor": "Monokai Soda",
-    "budget_tracing": "Nord",
-    "budget": "Monokai Remastered",
-    "agentic_ai_learning": "Gruvbox Material Dark",
-    "intro-to-langsmith": "Dracula+",
-    "seafoam": "Seafoam Pastel",
-}
-
-def extract_color(color_dict):
-    """Extract RGB components from color dictionary"""
-    if not color_dict or not isinstance(color_dict, dict):
-        return None
-    return {
-        "Red Component": float(color_dict.get("Red Component", 0)),
-        "Green Component": float(color_dict.get("Green Component", 0)),
-        "Blue Component": float(color_dict.get("Blue Component", 0))
-    }
-
-def load_color_scheme(scheme_path):
-    """Load color scheme from .itermcolors file"""
-    with open(scheme_path, 'rb') as f:
-        return plistlib.load(f)
-
-def create_profile(repo_name, scheme_name, colors):
-    """Create a profile dictionary with full color scheme"""
-    import uuid
-
-    profile = {
-        "Name": repo_name,
-        "Guid": f"{repo_name}-{uuid.uuid4()}",
-        "Dynamic Profile Parent Name": "Default",
-        "Custom Directory": "Yes",
-        "Working Directory": str(REPO_BASE_DIR / repo_name),
-        "Bound Hosts": ["*"],
-        "Tags": ["repo", "auto-switch"],
-        "Badge Text": repo_name,
-        "Normal Font": "JetBrainsMono-Regular 13",
-        "Scrollback Lines": 100000,
-        "Unlimited Scrollback": False,
-        "Terminal Type": "xterm-256color",
-        "Use Bold Font": True,
-        "Use Bright Bold": True,
-        "Use Italic Font": True,
-        "Visual Bell": True,
-    }
-
-    # Add background and foreground colors
-    if "Background Color" in colors:
-        profile["Background Color"] = extract_color(colors["Background Color"])
-    if "Foreground Color" in colors:
-        profile["Foreground Color"] = extract_color(colors["Foreground Color"])
-
-    # Add all 16 ANSI colors
-    for i in range(16):
-        ansi_key = f"Ansi {i} Color"
-        if ansi_key in colors:
-            profile[ansi_key] = extract_color(colors[ansi_key])
-
-    # Add optional colors
-    for color_type in ["Cursor Color", "Cursor Text Color", "Bold Color",
-                       "Selection Color", "Selected Text Color"]:
-        if color_type in colors:
-            color_value = extract_color(colors[color_type])
-            if color_value:
-                profile[color_type] = color_value
-
-    # Add automatic profile switching
-    profile["Automatic Profile Switching"] = {
-        "Enabled": True,
-        "Rules": [
-            {
-                "Pattern": f"{REPO_BASE_DIR}/{repo_name}*",
-                "Type": "Path"
-            }
-        ]
-    }
-
-    return profile
+from mac_setup import catalog, dotfiles, preflight, presets, snapshots
+from mac_setup.paths import DEFAULT, DOWNLOADED_SCHEMES_DIR, DYNAMIC_PROFILES_DIR
+from mac_setup.profiles import load_scheme, pack_bytes, repo_profile, rgb_colors
+from mac_setup.repos import REPO_SCHEMES
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schemes-dir", type=Path, default=DOWNLOADED_SCHEMES_DIR,
+                        help=f"directory of .itermcolors files (default: {DOWNLOADED_SCHEMES_DIR})")
+    parser.add_argument("--min-contrast", type=float, metavar="RATIO",
+                        help="skip schemes whose contrast is below RATIO (e.g. 4.5 for WCAG AA)")
+    parser.add_argument("--metric", choices=catalog.METRICS, default="fg_bg",
+                        help="contrast metric checked by --min-contrast (default: fg_bg)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    schemes_dir = args.schemes_dir
     profiles = []
 
     print("Rebuilding iTerm2 profiles with full color schemes...\n")
 
+    # Everything this run needs, checked at once before any scheme is read
+    if not preflight.check([
+        preflight.path(schemes_dir, kind="dir"),
+        preflight.schemes(REPO_SCHEMES.values(), schemes_dir, preflight.WARNING, skip_missing_dir=True),
+        preflight.writable(DYNAMIC_PROFILES_DIR),
+    ]):
+        return 1
+
+    # Same name resolution as the preflight check, e.g. "Gruvbox Dark" → GruvboxDark.itermcolors
+    available = presets.scan(schemes_dir)
+    scheme_files = {name: presets.scheme_file(name, available) for name in REPO_SCHEMES.values()}
+
+    low_contrast = {}
+    if args.min_contrast is not None:
+        low_contrast = catalog.below_threshold(
+            schemes_dir, [f[:-len(presets.SUFFIX)] for f in scheme_files.values() if f],
+            args.min_contrast, args.metric)
+
     for repo_name, scheme_name in REPO_SCHEMES.items():
-        scheme_path = SCHEMES_DIR / f"{scheme_name}.itermcolors"
+        file_name = scheme_files[scheme_name]
+
+        if file_name is None:
+            # Reported by the preflight check
+            continue
 
-        if not scheme_path.exists():
-            print(f"⚠️  Warning: Scheme file not found: {scheme_path}")
+        contrast = low_contrast.get(file_name[:-len(presets.SUFFIX)])
+        if contrast is not None:
+            print(f"⚠️  Skipping {repo_name}: {scheme_name} {args.metric} contrast "
+                  f"{contrast:.2f}:1 < {args.min_contrast}:1")
             continue
 
         print(f"✓ Processing {repo_name} → {scheme_name}")
 
-        # Load color scheme
-        colors = load_color_scheme(scheme_path)
+        colors = rgb_colors(load_scheme((schemes_dir / file_name).read_bytes()))
+        profiles.append(repo_profile(repo_name, colors, DEFAULT))
 
-        # Create profile
-        profile = create_profile(repo_name, scheme_name, colors)
-        profiles.append(profile)
+    snapshots.take_and_report("rebuild-profiles")
 
     # Write profiles JSON
     output_file = DYNAMIC_PROFILES_DIR / "RepoProfiles.json"
     DYNAMIC_PROFILES_DIR.mkdir(parents=True, exist_ok=True)
 
-    profiles_data = {"Profiles": profiles}
-
-    with open(output_file, 'w') as f:
-        json.dump(profiles_data, f, indent=2)
+    # Shared settings go into one generated parent profile
+    output_file.write_bytes(pack_bytes(profiles, output_file.stem))
 
     print(f"\n✓ Created {len(profiles)} profiles at: {output_file}")
+
+    # Regenerate the directory -> profile lookup used by the zsh chpwd and tmux hooks
+    dotfiles.deploy(["profile-switch.zsh", "profile-switch.tmux"])
+    print("✓ Updated profile switching hooks in ~/.mac-setup")
     print("\nNext steps:")
     print("1. Restart iTerm2 or go to Settings → Profiles → Refresh")
     print("2. The profiles will automatically switch when you cd into each repo")
+    print("   (requires the mac-setup ~/.zshrc block: ./mac-setup dotfiles)")
     print("3. Each profile now has its full color scheme with distinct colors\n")
 
+    return 0
+
 if __name__ == "__main__":
-    main()
+    exit(main())
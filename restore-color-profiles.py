@@ -1,140 +1,43 @@
 #!/usr/bin/env python3
 """
 Restore color profiles to iTerm2 as regular profiles with full color definitions
-Uses the data from the ColorProfiles.json that was previously deleted
+Uses the data from ColorProfiles.json; profiles that already exist are updated
+in place (only changed keys), missing ones are re-added with their original Guid
 """
 
-import plistlib
-import uuid
-import json
-from pathlib import Path
 
-ITERM_PLIST = Path.home() / "Library" / "Preferences" / "com.googlecode.iterm2.plist"
-BACKUP_FILE = Path.home() / "Library" / "Application Support" / "iTerm2" / "DynamicProfiles" / "ColorProfiles.json"
+from mac_setup import snapshots, sync
+from mac_setup.paths import DYNAMIC_PROFILES_DIR, ITERM_PLIST
 
-def read_plist():
-    """Read iTerm2 preferences"""
-    with open(ITERM_PLIST, 'rb') as f:
-        return plistlib.load(f)
-
-def write_plist(data):
-    """Write iTerm2 preferences"""
-    with open(ITERM_PLIST, 'wb') as f:
-        plistlib.dump(data, f)
-
-def convert_color(color_dict):
-    """Convert color dictionary, handling both formats"""
-    if not color_dict or not isinstance(color_dict, dict):
-        return None
-
-    result = {}
-    for key in ['Red Component', 'Green Component', 'Blue Component', 'Alpha Component', 'Color Space']:
-        if key in color_dict:
-            result[key] = color_dict[key]
-
-    return result if result else None
-
-def clean_profile(dynamic_profile):
-    """Convert dynamic profile to regular profile, preserving all colors"""
-    # Remove dynamic-specific keys
-    keys_to_remove = {
-        "Dynamic Profile Parent Name",
-        "Dynamic Profile Filename",
-        "Automatic Profile Switching",
-        "Custom Directory",
-        "Working Directory",
-        "Bound Hosts",
-        "Tags",
-        "Badge Text",
-        "Color Preset Name"  # Remove this since we have full colors
-    }
-
-    regular_profile = {}
-
-    for key, value in dynamic_profile.items():
-        if key not in keys_to_remove:
-            # Convert color dictionaries
-            if 'Color' in key and isinstance(value, dict):
-                converted = convert_color(value)
-                if converted:
-                    regular_profile[key] = converted
-            else:
-                regular_profile[key] = value
-
-    # Ensure Guid is updated
-    regular_profile["Guid"] = str(uuid.uuid4())
-
-    # Add standard fields if missing
-    if "Custom Command" not in regular_profile:
-        regular_profile["Custom Command"] = "No"
-
-    return regular_profile
+BACKUP_FILE = DYNAMIC_PROFILES_DIR / "ColorProfiles.json"
 
 def main():
     print("Restoring color profiles to iTerm2...\n")
 
     # Check if backup exists
-    if BACKUP_FILE.exists():
-        print(f"Found backup file: {BACKUP_FILE}")
-        with open(BACKUP_FILE, 'r') as f:
-            color_data = json.load(f)
-        dynamic_profiles = color_data.get("Profiles", [])
-    else:
-        print("⚠️  No backup file found, will need to recreate from inline data")
-        print("Since we have the color data, we can restore the profiles\n")
-        # The color profile data will be embedded in the script
+    if not BACKUP_FILE.exists():
+        print("⚠️  No backup file found")
+        print("Roll back to an earlier snapshot instead: ./mac-setup snapshots")
         return 1
 
-    print(f"Found {len(dynamic_profiles)} color profiles to restore")
+    print(f"Found backup file: {BACKUP_FILE}")
 
-    # Read current iTerm2 preferences
     try:
-        plist_data = read_plist()
+        changes = sync.sync(BACKUP_FILE, ITERM_PLIST, direction="to-regular",
+                            before_write=lambda: snapshots.take_and_report("restore-color-profiles"))
     except Exception as e:
-        print(f"❌ Error reading iTerm2 preferences: {e}")
+        print(f"❌ Error restoring profiles: {e}")
         return 1
 
-    # Get existing profiles
-    existing_profiles = plist_data.get("New Bookmarks", [])
-    existing_names = {p.get("Name") for p in existing_profiles}
-
-    print(f"Current regular profiles: {len(existing_profiles)}")
-    print(f"Names: {', '.join(sorted(existing_names))}\n")
-
-    # Convert and add profiles
-    added = []
-    skipped = []
-
-    for dynamic_profile in dynamic_profiles:
-        name = dynamic_profile.get("Name", "Unnamed")
-
-        if name in existing_names:
-            skipped.append(name)
-            print(f"⚠️  Skipping '{name}' - already exists")
-            continue
-
-        # Convert to regular profile
-        regular_profile = clean_profile(dynamic_profile)
-        existing_profiles.append(regular_profile)
-        added.append(name)
-        print(f"✓ Added '{name}' with full color definitions")
-
-    if added:
-        # Update preferences
-        plist_data["New Bookmarks"] = existing_profiles
-
-        try:
-            write_plist(plist_data)
-            print(f"\n✓ Successfully added {len(added)} new profiles")
-        except Exception as e:
-            print(f"\n❌ Error writing preferences: {e}")
-            return 1
-
-    if skipped:
-        print(f"\n⚠️  Skipped {len(skipped)} existing: {', '.join(skipped)}")
+    for action, name, keys in changes:
+        detail = f" ({len(keys)} keys)" if keys else ""
+        print(f"✓ {action}: '{name}'{detail}")
 
     print("\n" + "="*60)
-    print("✓ Color profiles restored with full color definitions!")
+    if changes:
+        print("✓ Color profiles restored with full color definitions!")
+    else:
+        print("✓ Color profiles are already up to date")
     print("\nNext steps:")
     print("1. Restart iTerm2 completely (Cmd+Q, then reopen)")
     print("2. Go to Settings → Profiles")
@@ -5,6 +5,8 @@
 
 set -e  # Exit on error
 
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+
 # Colors for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -55,61 +57,12 @@ ensure_user_gem_path() {
     fi
 }
 
-# Ensure .zshrc has a managed, idempotent block
-ensure_zshrc_block() {
-    local zshrc="$HOME/.zshrc"
-    local block_start="# >>> mac-setup >>>"
-    local block_end="# <<< mac-setup <<<"
-    local block_content
-    block_content="$(cat <<'EOF'
-# >>> mac-setup >>>
-# tmux
-alias ta='tmux attach -t'
-alias tn='tmux new -s'
-alias tl='tmux ls'
-
-# NVIM
-alias vim='nvim'
-alias vi='nvim'
-
-# General
-alias h='history'
-
-# Exports
-export TERM=xterm-256color
-# <<< mac-setup <<<
-EOF
-)"
-
-    if [[ -f "$zshrc" ]]; then
-        if grep -q "$block_start" "$zshrc"; then
-            /usr/bin/python3 - <<PY
-from pathlib import Path
-zshrc = Path("$HOME/.zshrc")
-text = zshrc.read_text()
-start = "$block_start"
-end = "$block_end"
-replacement = """$block_content"""
-import re
-pattern = re.compile(re.escape(start) + r".*?" + re.escape(end), re.S)
-text, count = pattern.subn(replacement.strip(), text)
-if count == 0:
-    text = text.rstrip() + "\\n\\n" + replacement.strip() + "\\n"
-zshrc.write_text(text)
-PY
-        else
-            printf "\n%s\n" "$block_content" >> "$zshrc"
-        fi
-    else
-        printf "%s\n" "$block_content" > "$zshrc"
-    fi
-}
-
 # Track install status
 ITERM2_STATUS="missing"
 TMUX_STATUS="missing"
 TPM_STATUS="missing"
 TMUX_CONF_STATUS="missing"
+ZSHRC_STATUS="missing"
 TMUXINATOR_STATUS="missing"
 WORKMUX_STATUS="missing"
 GIT_STATUS="missing"
@@ -145,9 +98,32 @@ else
     print_info "Homebrew is already installed"
 fi
 
-# Update Homebrew
-print_info "Updating Homebrew..."
-brew update
+# Check everything the rest of this run needs, before any package is installed.
+# This runs after the Homebrew bootstrap: on a fresh Mac python3 and git only
+# work once the Command Line Tools that Homebrew installs are in place.
+if python3 -c "" >/dev/null 2>&1; then
+    if ! "$SCRIPT_DIR/mac-setup" preflight dev-environment ${MAC_SETUP_BUNDLE:+--bundle "$MAC_SETUP_BUNDLE"}; then
+        print_error "Preflight checks failed; no packages were installed"
+        exit 1
+    fi
+else
+    print_warning "python3 is not usable yet (install the Command Line Tools: xcode-select --install); skipping preflight checks"
+fi
+
+# Offline mode: provision from a bundle built with ./mac-setup bundle build
+# (packages, git checkouts, dotfiles and profiles), then only verify below
+if [[ -n "$MAC_SETUP_BUNDLE" ]]; then
+    export HOMEBREW_NO_AUTO_UPDATE=1
+    print_info "Provisioning from bundle $MAC_SETUP_BUNDLE..."
+    if ! "$SCRIPT_DIR/mac-setup" bundle apply "$MAC_SETUP_BUNDLE"; then
+        print_error "Failed to apply bundle $MAC_SETUP_BUNDLE"
+        exit 1
+    fi
+else
+    # Update Homebrew
+    print_info "Updating Homebrew..."
+    brew update
+fi
 
 # Install iTerm2 (Homebrew Cask)
 if cask_installed iterm2 || app_bundle_exists "iTerm" || app_bundle_exists "iTerm2"; then
@@ -186,81 +162,29 @@ else
     TMUX_STATUS="ok"
 fi
 
-# Install TPM (Tmux Plugin Manager)
+# Fetch external git dependencies (TPM and iTerm2 color schemes) concurrently
+# Shallow, blobless clones on first run; fast-forward-only updates afterwards
 TPM_DIR="$HOME/.tmux/plugins/tpm"
-if [[ -d "$TPM_DIR" ]]; then
-    print_info "TPM (Tmux Plugin Manager) is already installed"
-    TPM_STATUS="ok"
+if [[ -n "$MAC_SETUP_BUNDLE" ]]; then
+    print_info "Git dependencies restored from bundle"
 else
-    print_info "Installing TPM (Tmux Plugin Manager)..."
-    if git clone https://github.com/tmux-plugins/tpm "$TPM_DIR"; then
-        print_info "TPM installed successfully"
-        TPM_STATUS="ok"
-    else
-        print_warning "Failed to install TPM"
+    print_info "Fetching git dependencies (TPM, iTerm2 color schemes)..."
+    if ! "$SCRIPT_DIR/mac-setup" fetch; then
+        print_warning "Some git dependencies could not be fetched"
     fi
 fi
+if [[ -d "$TPM_DIR/.git" ]]; then
+    TPM_STATUS="ok"
+fi
 
-# Configure tmux (~/.tmux.conf)
-print_info "Configuring tmux (~/.tmux.conf)..."
-TMUX_CONF="$HOME/.tmux.conf"
-TMUX_CONF_CONTENT='unbind-key C-b
-set -g prefix C-a
-bind-key C-a send-prefix
-
-bind r source ~/.tmux.conf \; display-message "Reloaded!"
-set -g  base-index 1
-set -g  renumber-windows on
-
-set -gq allow-passthrough on
-
-# List of plugins
-set -g @plugin '\''tmux-plugins/tpm'\''
-set -g @plugin '\''tmux-plugins/tmux-sensible'\''
-
-set -g @plugin '\''egel/tmux-gruvbox'\''
-
-
-set -g renumber-windows on   # renumber all windows when any window is closed
-set -g history-limit 1000000 # increase history size (from 2,000)
-set -g default-terminal "screen-256color"
-
-set -g @plugin '\''tmux-plugins/tmux-resurrect'\''
-set -g @plugin '\''tmux-plugins/tmux-continuum'\''
-
-# Split winowes
-bind | split-window -h
-bind - split-window -v
-
-set -g @continuum-restore '\''on'\''
-
-setw -g mode-keys vi
-set -g history-limit 1000000 
-
-# Other examples:
-# set -g @plugin '\''github_username/plugin_name'\''
-# set -g @plugin '\''github_username/plugin_name#branch'\''
-# set -g @plugin '\''git@github.com:user/plugin'\''
-# set -g @plugin '\''git@bitbucket.com:user/plugin'\''
-
-# Initialize TMUX plugin manager (keep this line at the very bottom of tmux.conf)
-run '\''~/.tmux/plugins/tpm/tpm'\'''
-
-# Check if config needs updating
-if [[ -f "$TMUX_CONF" ]]; then
-    EXISTING_CONF=$(cat "$TMUX_CONF")
-    if [[ "$EXISTING_CONF" == "$TMUX_CONF_CONTENT" ]]; then
-        print_info "tmux config is already up to date"
-        TMUX_CONF_STATUS="ok"
-    else
-        print_info "Updating tmux config..."
-        echo "$TMUX_CONF_CONTENT" > "$TMUX_CONF"
-        TMUX_CONF_STATUS="ok"
-    fi
-else
-    print_info "Creating tmux config..."
-    echo "$TMUX_CONF_CONTENT" > "$TMUX_CONF"
+# Deploy managed dotfiles (~/.tmux.conf and the ~/.zshrc block)
+# Templates live in mac_setup/templates; unchanged files are left untouched
+print_info "Deploying dotfiles (~/.tmux.conf, ~/.zshrc)..."
+if "$SCRIPT_DIR/mac-setup" dotfiles; then
     TMUX_CONF_STATUS="ok"
+    ZSHRC_STATUS="ok"
+else
+    print_warning "Failed to deploy dotfiles"
 fi
 
 # Install TPM plugins (if TPM is installed)
@@ -368,10 +292,6 @@ else
     fi
 fi
 
-# Ensure .zshrc updates are applied
-print_info "Updating ~/.zshrc with mac-setup defaults..."
-ensure_zshrc_block
-
 # Install tmuxinator
 if ! command_exists tmuxinator; then
     print_info "Installing tmuxinator..."
@@ -486,6 +406,7 @@ print_info "  - Docker Desktop: ${DOCKER_STATUS}"
 print_info "  - tmux: ${TMUX_STATUS}"
 print_info "  - TPM (tmux plugins): ${TPM_STATUS}"
 print_info "  - tmux config: ${TMUX_CONF_STATUS}"
+print_info "  - zshrc block: ${ZSHRC_STATUS}"
 print_info "  - Node.js: ${NODE_STATUS}"
 print_info "  - Python 3.9: ${PYTHON_39_STATUS}"
 print_info "  - Python 3.11: ${PYTHON_311_STATUS}"
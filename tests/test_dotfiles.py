@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mac_setup import dotfiles
+
+START, END = dotfiles.DOTFILES["zshrc"]["block"]
+
+
+class DeployTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = Path(tmp.name) / "home"
+        self.home.mkdir()
+        self.manifest = Path(tmp.name) / "dotfiles.json"
+        self.backups = Path(tmp.name) / "backups"
+
+    def deploy(self, names=("tmux.conf", "zshrc"), **kwargs):
+        results = dotfiles.deploy(list(names), home=self.home, manifest_file=self.manifest,
+                                  backups_dir=self.backups, **kwargs)
+        return {name: (status, backup) for name, _, status, backup in results}
+
+    def test_first_run_creates_then_rerun_is_unchanged(self):
+        self.assertEqual({n: s for n, (s, _) in self.deploy().items()},
+                         {"tmux.conf": "created", "zshrc": "created"})
+        self.assertEqual({n: s for n, (s, _) in self.deploy().items()},
+                         {"tmux.conf": "unchanged", "zshrc": "unchanged"})
+
+    def test_fast_path_neither_reads_nor_writes_targets(self):
+        self.deploy()
+        with mock.patch.object(Path, "read_bytes", side_effect=AssertionError("read")), \
+                mock.patch.object(dotfiles, "atomic_write", side_effect=AssertionError("write")), \
+                mock.patch.object(dotfiles, "save_manifest", side_effect=AssertionError("manifest")):
+            statuses = {n: s for n, (s, _) in self.deploy().items()}
+        self.assertEqual(statuses, {"tmux.conf": "unchanged", "zshrc": "unchanged"})
+
+    def test_matching_untracked_file_is_adopted(self):
+        (self.home / ".tmux.conf").write_bytes(dotfiles.render("tmux.conf", self.home))
+        status, backup = self.deploy(["tmux.conf"])["tmux.conf"]
+        self.assertEqual((status, backup), ("adopted", None))
+        self.assertFalse(self.backups.exists())
+
+    def test_update_writes_a_backup(self):
+        (self.home / ".tmux.conf").write_text("set -g mouse off\n")
+        status, backup = self.deploy(["tmux.conf"])["tmux.conf"]
+        self.assertEqual(status, "updated")
+        self.assertEqual(backup.read_text(), "set -g mouse off\n")
+        self.assertEqual(os.stat(backup).st_mode & 0o777, 0o600)
+        self.assertEqual((self.home / ".tmux.conf").read_bytes(), dotfiles.render("tmux.conf", self.home))
+
+    def test_block_splice_keeps_user_content(self):
+        zshrc = self.home / ".zshrc"
+        zshrc.write_text(f"export EDITOR=vim\n\n{START}\nold managed lines\n{END}\n\nalias ll='ls -l'\n")
+        status, _ = self.deploy(["zshrc"])["zshrc"]
+        self.assertEqual(status, "updated")
+        text = zshrc.read_text()
+        self.assertTrue(text.startswith("export EDITOR=vim\n\n"))
+        self.assertTrue(text.endswith("\n\nalias ll='ls -l'\n"))
+        self.assertNotIn("old managed lines", text)
+        self.assertEqual(text.count(START), 1)
+        self.assertIn(dotfiles.render("zshrc", self.home).decode().strip(), text)
+
+    def test_block_is_appended_when_missing(self):
+        zshrc = self.home / ".zshrc"
+        zshrc.write_text("export EDITOR=vim\n")
+        self.deploy(["zshrc"])
+        text = zshrc.read_text()
+        self.assertTrue(text.startswith("export EDITOR=vim\n\n" + START))
+
+    def test_dry_run_writes_nothing(self):
+        (self.home / ".tmux.conf").write_text("set -g mouse off\n")
+        statuses = {n: s for n, (s, _) in self.deploy(dry_run=True).items()}
+        self.assertEqual(statuses, {"tmux.conf": "updated", "zshrc": "created"})
+        self.assertEqual((self.home / ".tmux.conf").read_text(), "set -g mouse off\n")
+        self.assertFalse((self.home / ".zshrc").exists())
+        self.assertFalse(self.manifest.exists())
+        self.assertFalse(self.backups.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests import bare_repo, commit, git
+
+from mac_setup import gitfetch
+
+UPSTREAM = {
+    "README.md": "iTerm2 color schemes\n",
+    "screenshots/dracula.png": "not really a png\n",
+    "schemes/Dracula.itermcolors": "<plist>dracula</plist>\n",
+    "schemes/Nord.itermcolors": "<plist>nord</plist>\n",
+    "schemes/Nord.yml": "nord: for another terminal\n",
+}
+
+
+def checked_out(dest):
+    return sorted(p.relative_to(dest).as_posix() for p in Path(dest).rglob("*")
+                  if p.is_file() and ".git" not in p.relative_to(dest).parts)
+
+
+class FetchRepoTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        url, self.upstream = bare_repo(self.tmp, "schemes", UPSTREAM)
+        self.spec = {"url": url, "dest": self.tmp / "checkout",
+                     "sparse": ["/schemes/*.itermcolors"]}
+
+    def fetch(self):
+        return gitfetch.fetch_repo("iterm2-color-schemes", self.spec)
+
+    def test_first_clone_is_sparse(self):
+        result = self.fetch()
+        self.assertEqual(result["action"], "cloned", result["error"])
+        self.assertEqual(checked_out(self.spec["dest"]),
+                         ["schemes/Dracula.itermcolors", "schemes/Nord.itermcolors"])
+        self.assertEqual(git("rev-parse", "--is-shallow-repository", cwd=self.spec["dest"]), "true")
+
+    def test_rerun_is_unchanged(self):
+        self.fetch()
+        self.assertEqual(self.fetch()["action"], "unchanged")
+
+    def test_upstream_commit_fast_forwards(self):
+        self.fetch()
+        head = commit(self.upstream, {"schemes/Snazzy.itermcolors": "<plist>snazzy</plist>\n"})
+        result = self.fetch()
+        self.assertEqual(result["action"], "updated", result["error"])
+        self.assertEqual(git("rev-parse", "HEAD", cwd=self.spec["dest"]), head)
+        self.assertIn("schemes/Snazzy.itermcolors", checked_out(self.spec["dest"]))
+
+    def test_updates_stay_shallow(self):
+        self.fetch()
+        for i in range(3):
+            commit(self.upstream, {f"schemes/New{i}.itermcolors": f"<plist>{i}</plist>\n"})
+            self.assertEqual(self.fetch()["action"], "updated")
+        self.assertEqual(git("rev-list", "--count", "HEAD", cwd=self.spec["dest"]), "1")
+        self.assertEqual(self.fetch()["action"], "unchanged")
+
+    def test_diverged_checkout_fails(self):
+        self.fetch()
+        git("commit", "--quiet", "--allow-empty", "-m", "local", cwd=self.spec["dest"])
+        commit(self.upstream, {"schemes/Snazzy.itermcolors": "<plist>snazzy</plist>\n"})
+        result = self.fetch()
+        self.assertEqual(result["action"], "failed")
+        self.assertTrue(result["error"])
+
+    def test_non_git_destination_fails(self):
+        self.spec["dest"].mkdir()
+        (self.spec["dest"] / "notes.txt").write_text("mine\n")
+        result = self.fetch()
+        self.assertEqual(result["action"], "failed")
+        self.assertIn("is not a git checkout", result["error"])
+        self.assertEqual(checked_out(self.spec["dest"]), ["notes.txt"])
+
+    def test_fetch_all_runs_every_repo(self):
+        url, _ = bare_repo(self.tmp, "tpm", {"tpm": "#!/bin/sh\n"})
+        repos = {"tpm": {"url": url, "dest": self.tmp / "tpm"},
+                 "iterm2-color-schemes": self.spec}
+        results = {r["name"]: r["action"] for r in gitfetch.fetch_all(repos)}
+        self.assertEqual(results, {"tpm": "cloned", "iterm2-color-schemes": "cloned"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import plistlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mac_setup import preflight
+
+
+class RunTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.schemes_dir = self.tmp / "schemes"
+        self.schemes_dir.mkdir()
+        for name in ("Dracula", "GruvboxDark"):
+            (self.schemes_dir / f"{name}.itermcolors").write_text("<plist/>\n")
+        self.plist = self.tmp / "com.googlecode.iterm2.plist"
+        self.plist.write_bytes(plistlib.dumps({"GlobalKeyMap": {}, "New Bookmarks": [{"Name": "Default"}]}))
+
+    def messages(self, *checks):
+        return preflight.run(list(checks))
+
+    def test_all_good_is_silent(self):
+        self.assertEqual(self.messages(
+            preflight.path(self.schemes_dir, kind="dir"),
+            preflight.path(self.plist, kind="file"),
+            preflight.command("sh"),
+            preflight.writable(self.tmp / "new" / "deeper" / "file.json"),
+            preflight.schemes(["Dracula", "Gruvbox Dark"], self.schemes_dir),
+            preflight.plist(self.plist, keys=["GlobalKeyMap"], profiles=["Default"]),
+        ), [])
+
+    def test_paths(self):
+        self.assertEqual(self.messages(
+            preflight.path(self.tmp / "missing"),
+            preflight.path(self.plist, kind="dir"),
+            preflight.path(self.schemes_dir, kind="file"),
+        ), [("error", f"Not found: {self.tmp / 'missing'}"),
+            ("error", f"Not a directory: {self.plist}"),
+            ("error", f"Not a file: {self.schemes_dir}")])
+
+    def test_severity_and_hint_are_kept(self):
+        self.assertEqual(self.messages(preflight.command("no-such-command-here", preflight.WARNING,
+                                                         hint="install it first")),
+                         [("warning", "Command not found: no-such-command-here (install it first)")])
+
+    @unittest.skipIf(os.geteuid() == 0, "root can write anywhere")
+    def test_writable_checks_the_nearest_existing_parent(self):
+        locked = self.tmp / "locked"
+        locked.mkdir(mode=0o500)
+        self.addCleanup(locked.chmod, 0o700)
+        self.assertEqual(self.messages(preflight.writable(locked / "a" / "b")),
+                         [("error", f"Not writable: {locked}")])
+
+    def test_schemes(self):
+        self.assertEqual(self.messages(
+            preflight.schemes(["Dracula", "Nord", "Gruvbox Dark", "Gruvbox Light"], self.schemes_dir)),
+            [("error", "Scheme not found: Nord"), ("error", "Scheme not found: Gruvbox Light")])
+
+    def test_missing_schemes_directory(self):
+        missing = self.tmp / "no-checkout-yet"
+        self.assertEqual(self.messages(preflight.schemes(["Nord"], missing, skip_missing_dir=True)), [])
+        self.assertEqual(self.messages(preflight.schemes(["Nord"], missing)),
+                         [("error", f"Schemes directory not found: {missing}")])
+
+    def test_plist(self):
+        broken = self.tmp / "broken.plist"
+        broken.write_text("not a plist")
+        problems = self.messages(
+            preflight.plist(self.plist, keys=["GlobalKeyMap", "Custom Color Presets"], profiles=["Work"]),
+            preflight.plist(self.tmp / "missing.plist"),
+            preflight.plist(broken),
+        )
+        self.assertEqual(problems[:3], [
+            ("error", f"Missing key in {self.plist.name}: Custom Color Presets"),
+            ("error", f"No Work profile found in {self.plist.name}"),
+            ("error", f"iTerm2 preferences not found: {self.tmp / 'missing.plist'}"),
+        ])
+        self.assertEqual(len(problems), 4)
+        self.assertTrue(problems[3][1].startswith(f"Cannot read {broken}"))
+
+    def test_shared_paths_are_stated_once(self):
+        with mock.patch.object(preflight, "stat_or_none", wraps=preflight.stat_or_none) as stat:
+            self.messages(preflight.path(self.tmp), preflight.writable(self.tmp / "a"),
+                          preflight.writable(self.tmp / "b"))
+        stated = [call.args[0] for call in stat.call_args_list]
+        self.assertEqual(stated.count(self.tmp), 1)
+
+    def test_color_scheme_names_only_warn(self):
+        # install-dev-color-schemes.sh checks names before its fetch, which may still add them
+        [check] = [c for c in preflight.color_schemes_checks(["Nord"]) if c["check"] == "schemes"]
+        self.assertEqual(check["severity"], preflight.WARNING)
+
+
+class EvaluateTest(unittest.TestCase):
+    """evaluate() only reads the batched results it is given"""
+
+    def test_unknown_check(self):
+        with self.assertRaises(ValueError):
+            preflight.evaluate({"check": "bogus"}, {}, {}, {}, {})
+
+    def test_schemes_from_a_listing(self):
+        check = preflight.schemes(["Tango Dark", "Nord"], "/nowhere")
+        self.assertEqual(preflight.evaluate(check, {}, {}, {Path("/nowhere"): {"TangoDark.itermcolors"}}, {}),
+                         ["Scheme not found: Nord"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from mac_setup import presets
+from mac_setup.paths import Layout
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+SCHEMES = ["Dracula", "Nord", "Tango Dark"]
+
+
+def replace_file(path, text):
+    """Write a new file over path, the way git checkout or an editor would"""
+    tmp = path.with_name(f"{path.name}.new")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+class SyncTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.schemes = Path(tmp.name) / "schemes"
+        self.schemes.mkdir()
+        for name in SCHEMES:
+            (self.schemes / f"{name}{presets.SUFFIX}").write_text(f"<plist>{name}</plist>\n")
+        self.presets = Path(tmp.name) / "ColorPresets"
+        self.manifest = Path(tmp.name) / "presets.json"
+
+    def sync(self, names, **kwargs):
+        file_names = [f"{name}{presets.SUFFIX}" for name in names]
+        result = presets.sync(file_names, schemes_dir=self.schemes, presets_dir=self.presets,
+                              manifest_file=self.manifest, **kwargs)
+        return {key: sorted(n[:-len(presets.SUFFIX)] for n in names) for key, names in result.items()}
+
+    def installed(self):
+        return sorted(p.stem for p in self.presets.iterdir())
+
+    def test_rerun_is_a_no_op(self):
+        self.assertEqual(self.sync(SCHEMES)["installed"], SCHEMES)
+        manifest = self.manifest.read_bytes()
+        self.assertEqual(self.sync(SCHEMES), {"installed": [], "unchanged": SCHEMES,
+                                              "removed": [], "kept": []})
+        self.assertEqual(self.manifest.read_bytes(), manifest)
+
+    def test_changed_source_is_linked_again(self):
+        self.sync(["Nord"])
+        source = self.schemes / f"Nord{presets.SUFFIX}"
+        replace_file(source, "<plist>nord v2</plist>\n")
+        self.assertEqual(self.sync(["Nord"])["installed"], ["Nord"])
+        self.assertEqual((self.presets / source.name).read_text(), "<plist>nord v2</plist>\n")
+
+    def test_install_only_adds(self):
+        self.sync(SCHEMES)
+        result = self.sync(["Dracula"])
+        self.assertEqual((result["unchanged"], result["removed"]), (["Dracula"], []))
+        self.assertEqual(self.installed(), SCHEMES)
+
+    def test_exact_removes_the_rest(self):
+        self.sync(SCHEMES)
+        self.assertEqual(self.sync(["Dracula"], exact=True)["removed"], ["Nord", "Tango Dark"])
+        self.assertEqual(self.installed(), ["Dracula"])
+
+    def test_modified_preset_is_kept(self):
+        self.sync(["Dracula", "Nord"])
+        replace_file(self.presets / f"Nord{presets.SUFFIX}", "<plist>my nord, a bit darker</plist>\n")
+        self.assertEqual(self.sync(["Dracula"], exact=True)["kept"], ["Nord"])
+        self.assertEqual(self.installed(), ["Dracula", "Nord"])
+
+    def test_uninstall_removes_what_was_installed(self):
+        self.presets.mkdir()
+        (self.presets / f"Mine{presets.SUFFIX}").write_text("<plist>mine</plist>\n")
+        self.sync(["Dracula", "Nord"])
+        result = presets.uninstall(presets_dir=self.presets, manifest_file=self.manifest)
+        self.assertEqual(sorted(result["removed"]), [f"Dracula{presets.SUFFIX}", f"Nord{presets.SUFFIX}"])
+        self.assertEqual(self.installed(), ["Mine"])
+
+
+class PresetsCommandTest(unittest.TestCase):
+    """./mac-setup presets against a scratch MAC_SETUP_ROOT"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        layout = Layout(self.root)
+        layout.schemes_dir.mkdir(parents=True)
+        for name in SCHEMES:
+            (layout.schemes_dir / f"{name}{presets.SUFFIX}").write_text(f"<plist>{name}</plist>\n")
+        self.presets = layout.color_presets_dir
+
+    def run_cli(self, *args):
+        return subprocess.run([sys.executable, str(REPO_DIR / "main.py"), "presets", *args],
+                              env={**os.environ, "MAC_SETUP_ROOT": str(self.root)},
+                              capture_output=True, text=True)
+
+    def installed(self):
+        return sorted(p.stem for p in self.presets.iterdir())
+
+    def test_naming_one_scheme_after_all_keeps_the_rest(self):
+        self.run_cli("install", "--all")
+        result = self.run_cli("install", "Dracula")
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertEqual(self.installed(), SCHEMES)
+
+    def test_nothing_to_install_is_an_error(self):
+        self.run_cli("install", "--all")
+        for args in ((), ("Draculla",)):
+            with self.subTest(args=args):
+                result = self.run_cli("install", *args)
+                self.assertEqual(result.returncode, 1)
+                self.assertIn("❌", result.stdout)
+                self.assertEqual(self.installed(), SCHEMES)
+
+    def test_exact_refuses_when_a_name_is_mistyped(self):
+        self.run_cli("install", "--all")
+        result = self.run_cli("install", "Dracula", "Nrod", "--exact")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Not found: Nrod", result.stdout)
+        self.assertEqual(self.installed(), SCHEMES)
+
+    def test_exact_replaces_the_installed_set(self):
+        self.run_cli("install", "--all")
+        result = self.run_cli("install", "Tango Dark", "--exact")
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertEqual(self.installed(), ["Tango Dark"])
+
+
+if __name__ == "__main__":
+    unittest.main()
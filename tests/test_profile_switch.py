@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from mac_setup import profile_switch
+from mac_setup.paths import Layout
+from mac_setup.profiles import pack_bytes, repo_profile
+
+LAYOUT = Layout("/Users/alice")
+BASE = "/Users/alice/work/repo"
+
+
+def generated(*repos):
+    """Profiles as rebuild-profiles.py writes them, compacted through a generated parent"""
+    profiles = [repo_profile(repo, {}, LAYOUT) for repo in repos]
+    return json.loads(pack_bytes(profiles, "RepoProfiles"))["Profiles"]
+
+
+class TableTest(unittest.TestCase):
+
+    def test_only_generated_profiles_are_switched_to(self):
+        table = profile_switch.table_from_profiles(generated("budget", "budget_claude", "coding"))
+        self.assertEqual(table[1], ["budget", "budget_claude", "coding"])
+        self.assertEqual(profile_switch.lookup(table, f"{BASE}/budget_tracing"), "Default")
+        self.assertEqual(profile_switch.lookup(table, f"{BASE}/coding/src"), "coding")
+
+    def test_prefix_overlap(self):
+        table = profile_switch.table_from_profiles(generated("budget", "budget_claude"))
+        self.assertEqual(profile_switch.lookup(table, f"{BASE}/budget"), "budget")
+        self.assertEqual(profile_switch.lookup(table, f"{BASE}/budget/sub/dir"), "budget")
+        self.assertEqual(profile_switch.lookup(table, f"{BASE}/budget_claude/x"), "budget_claude")
+        self.assertEqual(profile_switch.lookup(table, f"{BASE}/budgetx"), "Default")
+
+    def test_tmux_hook_follows_home(self):
+        home = Path("/Users/alice")
+        snippet = profile_switch.render_tmux(Layout(home).state_dir / "profile-switch.zsh", home)
+        self.assertIn("zsh ~/.mac-setup/profile-switch.zsh --tmux", snippet)
+
+
+@unittest.skipUnless(shutil.which("zsh"), "zsh is not installed")
+class GeneratedZshTest(unittest.TestCase):
+    """Run the generated file in a real zsh, with a fake tmux that logs its arguments"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.base = self.tmp / "work" / "repo"
+        for repo in ("budget", "budget_claude", "coding/src"):
+            (self.base / repo).mkdir(parents=True)
+        self.table = profile_switch.compile_table(
+            {self.base / repo: repo for repo in ("budget", "budget_claude", "coding")})
+        self.zsh_file = self.tmp / "profile-switch.zsh"
+        self.zsh_file.write_text(profile_switch.render_zsh(self.table))
+
+        bin_dir = self.tmp / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "tmux").write_text(f'#!/bin/sh\necho "$*" >> {self.tmp}/tmux.log\n')
+        (bin_dir / "tmux").chmod(0o755)
+        self.env = {"PATH": f"{bin_dir}:{os.environ['PATH']}", "HOME": str(self.tmp)}
+
+    def zsh(self, *args, **env):
+        return subprocess.run(["zsh", "-f", *args], cwd=self.tmp, env={**self.env, **env},
+                              capture_output=True, text=True, check=True).stdout
+
+    def tmux_log(self):
+        log = self.tmp / "tmux.log"
+        return log.read_text().splitlines() if log.exists() else []
+
+    def test_lookup_matches_python(self):
+        dirs = [self.base / "budget", self.base / "budget/sub/dir", self.base / "budget_claude/x",
+                self.base / "budgetx", self.base / "coding/src", self.tmp]
+        out = self.zsh("-c", f"source {self.zsh_file}; "
+                             'for d in "$@"; do _mac_setup_profile_for "$d"; print -r -- $REPLY; done',
+                       "zsh", *map(str, dirs))
+        self.assertEqual(out.splitlines(), [profile_switch.lookup(self.table, str(d)) for d in dirs])
+
+    def test_cd_inside_tmux_records_the_profile(self):
+        out = self.zsh("-c", f"source {self.zsh_file}; cd {self.base}/coding/src; cd {self.base}/budget",
+                       TMUX="/tmp/tmux-501/default,1,0", ITERM_SESSION_ID="w0t0p0")
+        self.assertIn("SetProfile=coding", out)
+        self.assertIn("SetProfile=budget", out)
+        self.assertEqual(self.tmux_log(), ["set -g @mac_setup_profile coding",
+                                           "set -g @mac_setup_profile budget"])
+
+    def test_focus_hook_only_emits_on_change(self):
+        tty = self.tmp / "tty"
+        self.zsh(str(self.zsh_file), "--tmux", f"{self.base}/coding", str(tty), "coding")
+        self.assertFalse(tty.exists())
+        self.zsh(str(self.zsh_file), "--tmux", f"{self.base}/budget", str(tty), "coding")
+        self.assertIn("SetProfile=budget", tty.read_text())
+        self.assertEqual(self.tmux_log(), ["set -g @mac_setup_profile budget"])
+
+
+if __name__ == "__main__":
+    unittest.main()
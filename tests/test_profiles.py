@@ -0,0 +1,91 @@
+import json
+import plistlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from mac_setup import dotfiles, profiles
+
+DYNAMIC = "Library/Application Support/iTerm2/DynamicProfiles"
+
+
+def scheme(red):
+    color = {"Red Component": red, "Green Component": 0.2, "Blue Component": 0.3}
+    return plistlib.dumps({"Background Color": color, "Foreground Color": color, "Link Color": color})
+
+
+SCHEMES = {"Dracula": scheme(0.1), "Nord": scheme(0.2), "Tango Dark": scheme(0.3)}
+
+
+class RenderBatchTest(unittest.TestCase):
+
+    def render(self, targets):
+        return profiles.render_batch(profiles.check_targets(targets), SCHEMES.get)
+
+    def test_same_inputs_same_bytes(self):
+        targets = [{"id": "alice"}, {"id": "ci", "home": "/build/ci", "packs": ["repos", "standalone"]}]
+        self.assertEqual(self.render(targets), self.render(targets))
+
+    def test_repo_pack_comes_with_switch_hooks(self):
+        result = self.render([{"id": "bob", "home": "/home/bob", "packs": ["repos"],
+                               "repos": {"api": "Dracula", "web": "Nord", "docs": "Missing"}}])["bob"]
+        self.assertEqual(sorted(result["files"]), [".mac-setup/profile-switch.tmux",
+                                                   ".mac-setup/profile-switch.zsh",
+                                                   f"{DYNAMIC}/RepoProfiles.json"])
+        self.assertEqual(result["missing"], ["Missing"])
+        zsh = result["files"][".mac-setup/profile-switch.zsh"].decode()
+        self.assertIn("'/home/bob/work/repo/api/' '/home/bob/work/repo/web/'", zsh)
+        self.assertNotIn("docs", zsh)
+
+    def test_hooks_match_what_dotfiles_deploys(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            home = Path(tmp)
+            files = self.render([{"id": "me", "home": str(home), "packs": ["repos"],
+                                  "repos": {"api": "Dracula", "api-v2": "Nord"}}])["me"]["files"]
+            (home / DYNAMIC).mkdir(parents=True)
+            (home / DYNAMIC / "RepoProfiles.json").write_bytes(files[f"{DYNAMIC}/RepoProfiles.json"])
+            for name in ("profile-switch.zsh", "profile-switch.tmux"):
+                self.assertEqual(files[f".mac-setup/{name}"], dotfiles.render(name, home))
+
+    def test_stable_guids(self):
+        first = self.render([{"id": "a", "packs": ["embedded"]}])["a"]["files"]
+        second = self.render([{"id": "b", "home": "/Users/a", "packs": ["embedded"]}])["b"]["files"]
+        self.assertEqual(first, second)
+        self.assertIn(profiles.stable_guid("Dracula").encode(), first[f"{DYNAMIC}/ColorProfiles.json"])
+
+    def test_standalone_guids_do_not_depend_on_position(self):
+        load = lambda name: profiles.load_scheme(SCHEMES[name]) if name in SCHEMES else None
+        full = profiles.standalone_pack(load, None, ["Dracula", "Nord"])[0]
+        gap = profiles.standalone_pack(load, None, ["Missing", "Nord"])[0]
+        self.assertEqual(full[1]["Guid"], gap[0]["Guid"])
+
+    def test_guids_are_unique_across_packs(self):
+        files = self.render([{"id": "a", "packs": ["embedded", "standalone"]}])["a"]["files"]
+        guids = [p["Guid"] for data in files.values() for p in json.loads(data)["Profiles"]]
+        self.assertEqual(len(guids), len(set(guids)))
+
+
+class CheckTargetsTest(unittest.TestCase):
+
+    def test_defaults(self):
+        [target] = profiles.check_targets([{"id": "alice"}])
+        self.assertEqual(target["home"], "/Users/alice")
+        self.assertEqual(target["packs"], list(profiles.PACKS))
+
+    def test_rejects_bad_targets(self):
+        for targets in ({"id": "a"}, [1], [{"home": "/x"}], [{"id": "../../x"}], [{"id": ".hidden"}],
+                        [{"id": "a/b"}], [{"id": "a"}, {"id": "a"}], [{"id": "a", "home": "rel"}],
+                        [{"id": "a", "packs": ["nope"]}], [{"id": "a", "standalone": "Nord"}]):
+            with self.subTest(targets=targets), self.assertRaises(profiles.TargetError):
+                profiles.check_targets(targets)
+
+    def test_directory_source_stays_in_its_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "schemes").mkdir()
+            (Path(tmp) / "secret.itermcolors").write_bytes(b"x")
+            source = profiles.directory_source(Path(tmp) / "schemes")
+            self.assertIsNone(source("../secret"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from mac_setup import snapshots
+
+
+def pack(profiles):
+    return (json.dumps({"Profiles": profiles}, indent=2) + "\n").encode()
+
+
+class DynamicProfilesSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.dynamic = self.tmp / "DynamicProfiles"
+        self.dynamic.mkdir()
+        self.profiles = [{"Name": f"P{i}", "Guid": f"guid-{i}", "Badge Text": f"P{i}"} for i in range(200)]
+        (self.dynamic / "Big.json").write_bytes(pack(self.profiles))
+
+    def take(self, reason):
+        return snapshots.take(reason, self.tmp / "store", self.tmp / "prefs.plist", self.dynamic)
+
+    def test_one_changed_profile_stores_one_unit(self):
+        self.take("before")
+        self.profiles[7]["Badge Text"] = "changed"
+        (self.dynamic / "Big.json").write_bytes(pack(self.profiles))
+        record = snapshots.load_record(self.tmp / "store", self.take("after"))
+        self.assertEqual(list(record["changes"]), ["dynamic-profile/Big.json/guid-7"])
+        self.assertEqual(record["removed"], [])
+
+    def test_restore_is_byte_for_byte(self):
+        original = (self.dynamic / "Big.json").read_bytes()
+        (self.dynamic / "notes.txt").write_bytes(b"not json\n")
+        first = self.take("before")
+
+        del self.profiles[3]
+        (self.dynamic / "Big.json").write_bytes(pack(self.profiles))
+        (self.dynamic / "notes.txt").write_bytes(b"edited\n")
+        (self.dynamic / "New.json").write_bytes(pack([]))
+        snapshots.restore(first, self.tmp / "store", self.tmp / "prefs.plist", self.dynamic)
+
+        self.assertEqual((self.dynamic / "Big.json").read_bytes(), original)
+        self.assertEqual((self.dynamic / "notes.txt").read_bytes(), b"not json\n")
+        self.assertFalse((self.dynamic / "New.json").exists())
+
+    def test_unparseable_file_is_one_unit(self):
+        (self.dynamic / "Broken.json").write_bytes(b'{"Profiles": [')
+        units = snapshots.capture_dynamic(self.dynamic)
+        self.assertEqual(units["dynamic/Broken.json"], b'{"Profiles": [')
+        self.assertEqual(len(units), len(self.profiles) + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
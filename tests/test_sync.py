@@ -0,0 +1,56 @@
+import copy
+import unittest
+
+from mac_setup import sync
+
+
+def generated(names, run):
+    """A DynamicProfiles file as an older generator wrote it: fresh Guids on every run"""
+    return [{"Name": name, "Guid": f"{name}-run{run}", "Background Color": {"Red Component": 0.1}}
+            for name in names]
+
+
+class PlanTest(unittest.TestCase):
+
+    def test_regenerated_guids_keep_their_pairing(self):
+        bookmarks, state = [], {}
+        _, state = sync.plan(generated(["Dracula", "Nord"], 1), bookmarks, state, "to-regular")
+        regular_guids = [p["Guid"] for p in bookmarks]
+
+        changes, state = sync.plan(generated(["Dracula", "Nord"], 2), bookmarks, state, "to-regular")
+        self.assertEqual(changes, [])
+        self.assertEqual([p["Guid"] for p in bookmarks], regular_guids)
+        self.assertEqual(sorted(state["profiles"]), ["Dracula-run2", "Nord-run2"])
+
+        dynamic = generated(["Dracula", "Nord"], 3)
+        dynamic[0]["Background Color"] = {"Red Component": 0.5}
+        changes, _ = sync.plan(dynamic, bookmarks, state, "to-regular")
+        self.assertEqual(changes, [("updated regular", "Dracula", ["Background Color"])])
+        self.assertEqual([p["Guid"] for p in bookmarks], regular_guids)
+
+    def test_to_regular_re_adds_deleted_regular_profiles(self):
+        dynamic = generated(["Dracula", "Nord"], 1)
+        bookmarks, state = [], {}
+        _, state = sync.plan(dynamic, bookmarks, state, "to-regular")
+        dracula_guid = bookmarks[0]["Guid"]
+        del bookmarks[0]
+
+        changes, state = sync.plan(dynamic, bookmarks, state, "to-regular")
+        self.assertEqual(changes, [("added to regular", "Dracula", [])])
+        self.assertEqual(bookmarks[-1]["Guid"], dracula_guid)
+        self.assertEqual(sync.plan(dynamic, bookmarks, state, "to-regular")[0], [])
+
+    def test_both_directions_remove_dynamic_profile_deleted_from_regular(self):
+        dynamic = generated(["Dracula", "Nord"], 1)
+        bookmarks, state = [], {}
+        _, state = sync.plan(dynamic, bookmarks, state)
+        del bookmarks[0]
+        remaining = copy.deepcopy(dynamic)
+
+        changes, _ = sync.plan(remaining, bookmarks, state)
+        self.assertEqual(changes, [("removed from dynamic", "Dracula", [])])
+        self.assertEqual([p["Name"] for p in remaining], ["Nord"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@
 # iTerm2 Profile Uninstall Script
 # Removes the dynamic profiles created by setup-iterm-profiles.sh
 
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 DYNAMIC_PROFILES_DIR="$HOME/Library/Application Support/iTerm2/DynamicProfiles"
 PROFILE_FILE="$DYNAMIC_PROFILES_DIR/RepoProfiles.json"
 
@@ -13,15 +14,13 @@ echo ""
 if [ -f "$PROFILE_FILE" ]; then
     echo "Found dynamic profiles at: $PROFILE_FILE"
     echo ""
-    echo "This will remove the 8 repo-specific profiles:"
-    echo "  - mac-setup"
-    echo "  - transcript_extraction_dev"
-    echo "  - budget_claude"
-    echo "  - budget_cursor"
-    echo "  - budget_tracing"
-    echo "  - budget"
-    echo "  - agentic_ai_learning"
-    echo "  - intro-to-langsmith"
+    echo "This will remove the repo-specific profiles:"
+    PYTHONPATH="$SCRIPT_DIR" python3 - "$PROFILE_FILE" <<'PYLIST'
+import json, sys
+from mac_setup.compact import expand
+for profile in expand(json.load(open(sys.argv[1])).get("Profiles", [])):
+    print(f"  - {profile.get('Name')}")
+PYLIST
     echo ""
     echo "Your existing profiles (Default, CaryatidA, seafoam) will NOT be affected."
     echo "They will keep their 100,000 line scrollback setting."
@@ -30,14 +29,18 @@ if [ -f "$PROFILE_FILE" ]; then
     echo ""
 
     if [[ $REPLY =~ ^[Yy]$ ]]; then
+        "$SCRIPT_DIR/mac-setup" snapshot -m "uninstall-iterm-profiles"
         rm "$PROFILE_FILE"
         echo "✓ Removed $PROFILE_FILE"
+        # No repo profiles left to switch to
+        "$SCRIPT_DIR/mac-setup" dotfiles profile-switch.zsh > /dev/null
         echo ""
         echo "Next steps:"
         echo "1. Restart iTerm2 or go to Settings → Profiles → Refresh"
         echo "2. The repo profiles will no longer appear in your profile list"
         echo ""
         echo "To restore the profiles, run: ./setup-iterm-profiles.sh"
+        echo "or roll back to the snapshot above: ./mac-setup rollback <id>"
     else
         echo "Uninstall cancelled."
     fi